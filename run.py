@@ -22,7 +22,6 @@ if src_path not in sys.path:
 def main():
     """主入口函数"""
     import argparse
-    import uvicorn
     
     parser = argparse.ArgumentParser(
         prog="peptide-opt",
@@ -100,6 +99,10 @@ def main():
     
     args = parser.parse_args()
     
+    # 只有启动 API 服务时才导入 uvicorn，直接运行优化流程时不加载 Web 服务依赖
+    if args.command in (None, "serve"):
+        import uvicorn
+    
     # 如果没有指定命令，默认启动 API 服务
     if args.command is None:
         print("🚀 默认启动 API 服务 (开发模式，自动重载已启用)")
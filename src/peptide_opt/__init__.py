@@ -8,6 +8,12 @@ using ProteinMPNN and molecular docking.
 __version__ = "1.0.0"
 __author__ = "Your Name"
 
-from peptide_opt.core.optimizer import PeptideOptimizer
-
 __all__ = ["PeptideOptimizer", "__version__"]
+
+
+def __getattr__(name):
+    # PeptideOptimizer 依赖 PyMOL/Biopython/pandas，首次访问时才导入
+    if name == "PeptideOptimizer":
+        from peptide_opt.core.optimizer import PeptideOptimizer
+        return PeptideOptimizer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -7,7 +7,6 @@
 import argparse
 import os
 import sys
-import uvicorn
 
 
 def main():
@@ -78,6 +77,7 @@ def main():
     
     if args.command == "serve":
         # 启动 API 服务
+        import uvicorn
         uvicorn.run(
             "peptide_opt.api.app:create_app",
             factory=True,
@@ -7,24 +7,26 @@ FastAPI 应用工厂
 
 import logging
 from contextlib import asynccontextmanager
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 
 from peptide_opt.config import settings
-from peptide_opt.config.logging import setup_logging
-from peptide_opt.tasks.processor import AsyncTaskProcessor
+from peptide_opt.config.logging import flush_logging, setup_logging
+
+if TYPE_CHECKING:
+    from peptide_opt.tasks.processor import AsyncTaskProcessor
 
 logger = logging.getLogger(__name__)
 
 # 全局异步任务处理器
-_async_processor: Optional[AsyncTaskProcessor] = None
+_async_processor: Optional["AsyncTaskProcessor"] = None
 
 
-def get_async_processor() -> AsyncTaskProcessor:
+def get_async_processor() -> "AsyncTaskProcessor":
     """获取异步任务处理器实例"""
     if _async_processor is None:
         raise RuntimeError("Async processor not initialized")
@@ -39,23 +41,31 @@ async def lifespan(app: FastAPI):
     # —— 应用启动时执行 ——
     logger.info("Starting Peptide Optimization API...")
     
-    # 初始化异步任务处理器
+    # 初始化异步任务处理器（任务处理器及其依赖在应用启动时才导入）
     logger.info("Initializing async task processor...")
+    from peptide_opt.tasks.processor import AsyncTaskProcessor
     _async_processor = AsyncTaskProcessor()
     
     # 启动数据库轮询
     logger.info("Starting database polling for peptide optimization tasks...")
     await _async_processor.start_polling()
     
+    # API 请求与后台任务共用处理器的长连接池
+    app.state.pool = _async_processor.db_pool
+    
     logger.info("Peptide Optimization API startup complete")
     
     yield
     
     # —— 应用关闭时执行 ——
     logger.info("Shutting down Peptide Optimization API...")
+    app.state.pool = None
     if _async_processor:
         await _async_processor.shutdown()
+    from peptide_opt.db import close_pool
+    await close_pool()
     logger.info("Peptide Optimization API shutdown complete")
+    flush_logging()
 
 
 def create_app() -> FastAPI:
@@ -68,8 +78,10 @@ def create_app() -> FastAPI:
     # 设置日志
     setup_logging(level="INFO")
     
+    # 所有端点默认用 orjson 序列化响应
     app = FastAPI(
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
         title="Peptide Optimization API",
         description="Peptide structure optimization and sequence design service using ProteinMPNN and molecular docking.",
         version="1.0.0",
@@ -101,24 +113,24 @@ def _register_exception_handlers(app: FastAPI):
     
     @app.exception_handler(RequestValidationError)
     async def validation_exception_handler(request: Request, exc: RequestValidationError):
-        logger.error(f"Validation error: {exc}")
-        return JSONResponse(
+        logger.error("Validation error: %s", exc)
+        return ORJSONResponse(
             status_code=422,
             content={"detail": exc.errors(), "body": exc.body}
         )
     
     @app.exception_handler(HTTPException)
     async def http_exception_handler(request: Request, exc: HTTPException):
-        logger.error(f"HTTP error: {exc.detail}")
-        return JSONResponse(
+        logger.error("HTTP error: %s", exc.detail)
+        return ORJSONResponse(
             status_code=exc.status_code,
             content={"detail": exc.detail}
         )
     
     @app.exception_handler(Exception)
     async def general_exception_handler(request: Request, exc: Exception):
-        logger.error(f"Unexpected error: {str(exc)}")
-        return JSONResponse(
+        logger.error("Unexpected error: %s", exc)
+        return ORJSONResponse(
             status_code=500,
             content={"detail": "Internal server error"}
         )
@@ -126,21 +138,20 @@ def _register_exception_handlers(app: FastAPI):
 
 def _register_routes(app: FastAPI):
     """注册路由"""
-    from peptide_opt.api.routes import health
+    from peptide_opt.api.routes import health, root
+    
+    # 根路由
+    app.include_router(root.router, tags=["Root"])
     
     # 健康检查路由
     app.include_router(health.router, tags=["Health"])
-    
-    # 根路由
-    @app.get("/")
-    async def root():
-        """根路径重定向到文档"""
-        return {
-            "message": "Peptide Optimization API",
-            "version": "1.0.0",
-            "docs": "/docs",
-        }
-
-
-# 创建默认应用实例（用于 uvicorn 直接引用）
-app = create_app()
+
+
+# 默认应用实例（用于 uvicorn 直接引用 peptide_opt.api.app:app）
+# 首次访问时才创建；以工厂方式启动 (create_app, factory=True) 时不会再多构建一个应用 (PEP 562)
+def __getattr__(name: str):
+    if name == "app":
+        value = create_app()
+        globals()["app"] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
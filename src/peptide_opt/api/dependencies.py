@@ -4,13 +4,19 @@ API 依赖注入
 
 from typing import Generator
 
+from fastapi import Request
+
 from peptide_opt.storage import get_storage
 from peptide_opt.db import get_async_pool
 
 
-async def get_db_connection():
-    """获取数据库连接"""
-    pool = await get_async_pool()
+async def get_db_connection(request: Request):
+    """
+    获取数据库连接（直接使用连接池自带的上下文管理器，请求结束自动归还）
+    
+    优先使用应用启动时放在 app.state.pool 上的长连接池，未设置时使用模块级连接池
+    """
+    pool = getattr(request.app.state, "pool", None) or await get_async_pool()
     async with pool.acquire() as conn:
         yield conn
 
@@ -2,6 +2,6 @@
 API 路由模块
 """
 
-from peptide_opt.api.routes import health
+from peptide_opt.api.routes import health, root
 
-__all__ = ["health"]
+__all__ = ["health", "root"]
@@ -2,10 +2,38 @@
 健康检查路由
 """
 
-from fastapi import APIRouter, Response
+import time
+
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import ORJSONResponse
 
 router = APIRouter()
 
+# 就绪检查借用数据库连接的超时（秒）
+READY_DB_TIMEOUT = 2.0
+# 就绪检查结果的缓存时间（秒）：探针频繁轮询时，短时间内复用上次的数据库检查结果
+READY_CACHE_TTL = 1.0
+
+# 最近一次数据库检查: (检查时刻 monotonic, 是否可用)
+_ready_state = (float("-inf"), False)
+
+
+async def _database_ready(pool) -> bool:
+    """借一个连接执行 SELECT 1，结果在 READY_CACHE_TTL 内复用"""
+    global _ready_state
+    checked_at, ready = _ready_state
+    now = time.monotonic()
+    if now - checked_at < READY_CACHE_TTL:
+        return ready
+    try:
+        async with pool.acquire(timeout=READY_DB_TIMEOUT) as conn:
+            await conn.fetchval("SELECT 1")
+        ready = True
+    except Exception:
+        ready = False
+    _ready_state = (time.monotonic(), ready)
+    return ready
+
 
 @router.get("/health")
 async def health_check():
@@ -23,13 +51,16 @@ async def health_check():
 
 
 @router.get("/health/ready")
-async def readiness_check():
+async def readiness_check(request: Request):
     """
     就绪检查端点
     
-    检查服务是否准备好接收请求
+    检查服务是否准备好接收请求：从应用共用的连接池借一个连接执行 SELECT 1，
+    不为每次检查新建数据库连接；检查结果短时间缓存，频繁轮询不会每次都访问数据库
     """
-    # TODO: 添加数据库连接检查等
+    pool = getattr(request.app.state, "pool", None)
+    if pool is None or not await _database_ready(pool):
+        return ORJSONResponse(status_code=503, content={"status": "not ready", "database": "unavailable"})
     return {"status": "ready"}
 
 
@@ -0,0 +1,17 @@
+"""
+根路由
+"""
+
+from fastapi import APIRouter
+
+router = APIRouter()
+
+
+@router.get("/")
+async def root():
+    """根路径重定向到文档"""
+    return {
+        "message": "Peptide Optimization API",
+        "version": "1.0.0",
+        "docs": "/docs",
+    }
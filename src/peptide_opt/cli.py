@@ -6,6 +6,9 @@ CLI 工具 - 命令行直接运行肽段优化
 import sys
 from pathlib import Path
 
+# 项目根目录 (src/peptide_opt/cli.py -> 项目根)
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
 
 def run_optimizer(
     input_dir: str = "./data/input",
@@ -79,11 +82,11 @@ def run_optimizer(
 
 
 def _find_proteinmpnn_dir() -> Path:
-    """查找 ProteinMPNN 目录"""
+    """查找 ProteinMPNN 目录（始终返回绝对路径，运行结果不依赖当前工作目录）"""
     # 按优先级查找
     search_paths = [
-        Path(__file__).parent.parent.parent.parent / "vendor" / "ProteinMPNN",  # src/../vendor/
-        Path(__file__).parent.parent.parent.parent / "ProteinMPNN",  # 项目根目录
+        _PROJECT_ROOT / "vendor" / "ProteinMPNN",  # src/../vendor/
+        _PROJECT_ROOT / "ProteinMPNN",  # 项目根目录
         Path.cwd() / "ProteinMPNN",  # 当前工作目录
         Path.cwd() / "vendor" / "ProteinMPNN",
     ]
@@ -93,7 +96,7 @@ def _find_proteinmpnn_dir() -> Path:
             return path.resolve()
     
     # 默认返回项目根目录下的路径
-    return Path(__file__).parent.parent.parent.parent / "vendor" / "ProteinMPNN"
+    return _PROJECT_ROOT / "vendor" / "ProteinMPNN"
 
 
 if __name__ == "__main__":
@@ -2,10 +2,58 @@
 日志配置
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 from typing import Optional
 
+# 后台写日志的监听线程；日志记录只入队，控制台/文件写入在该线程中完成
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+# 文件日志缓冲：攒满一批或遇到 ERROR 以上级别时才写盘
+_file_buffer: Optional[logging.handlers.MemoryHandler] = None
+
+FILE_BUFFER_CAPACITY = 200
+
+# 日志格式未引用的 LogRecord 字段，按字段关闭 logging 模块中对应的采集开关
+_RECORD_FIELD_SWITCHES = (
+    (('%(thread)', '%(threadName)'), 'logThreads'),
+    (('%(process)',), 'logProcesses'),
+)
+
+
+def _disable_unused_record_fields(format_string: str):
+    """
+    关闭格式中用不到的日志记录字段采集
+    
+    线程 ID/名称和进程 ID 在每条记录创建时都会查询，格式中未引用时关闭对应开关
+    """
+    for fields, switch in _RECORD_FIELD_SWITCHES:
+        setattr(logging, switch, any(f in format_string for f in fields))
+
+
+def flush_logging():
+    """把缓冲中的文件日志立即写盘"""
+    if _file_buffer is not None:
+        _file_buffer.flush()
+
+
+def stop_logging():
+    """停止后台日志线程，写出队列和缓冲中剩余的日志"""
+    global _queue_listener, _file_buffer
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+    if _file_buffer is not None:
+        file_handler = _file_buffer.target
+        _file_buffer.close()
+        file_handler.close()
+        _file_buffer = None
+
+
+atexit.register(stop_logging)
+
 
 def setup_logging(
     level: str = "INFO",
@@ -15,11 +63,16 @@ def setup_logging(
     """
     配置日志系统
     
+    根日志记录器只挂一个 QueueHandler，实际的控制台/文件输出由 QueueListener
+    在后台线程中完成，记录日志时不会因磁盘或终端写入阻塞事件循环
+    
     Args:
         level: 日志级别 (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_file: 日志文件路径（可选）
         format_string: 日志格式字符串（可选）
     """
+    global _queue_listener, _file_buffer
+    
     if format_string is None:
         format_string = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     
@@ -27,22 +80,39 @@ def setup_logging(
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, level.upper(), logging.INFO))
     
-    # 清除现有处理器
+    # 清除现有处理器（重复调用时先停止旧的后台线程）
+    stop_logging()
     root_logger.handlers.clear()
     
+    _disable_unused_record_fields(format_string)
+    
     # 创建格式器
     formatter = logging.Formatter(format_string)
     
-    # 添加控制台处理器
+    # 控制台处理器
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    handlers = [console_handler]
     
-    # 如果指定了日志文件，添加文件处理器
+    # 如果指定了日志文件，添加文件处理器（经 MemoryHandler 批量写盘）
     if log_file:
         file_handler = logging.FileHandler(log_file, encoding='utf-8')
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        _file_buffer = logging.handlers.MemoryHandler(
+            FILE_BUFFER_CAPACITY,
+            flushLevel=logging.ERROR,
+            target=file_handler,
+            flushOnClose=True,
+        )
+        handlers.append(_file_buffer)
+    
+    # 日志记录经队列交给后台线程输出
+    log_queue = queue.SimpleQueue()
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    _queue_listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    _queue_listener.start()
     
     # 设置第三方库的日志级别
     logging.getLogger("uvicorn").setLevel(logging.WARNING)
@@ -50,4 +120,4 @@ def setup_logging(
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("urllib3").setLevel(logging.WARNING)
     
-    root_logger.info(f"Logging configured with level: {level}")
+    root_logger.info("Logging configured with level: %s", level)
@@ -4,18 +4,27 @@
 """
 
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Optional
 from dataclasses import dataclass, field
 
 import yaml
 
-# 尝试加载 .env 文件
+# 优先使用 libyaml 的 C 实现解析器，未编译 libyaml 时退回纯 Python 实现
 try:
-    from dotenv import load_dotenv
-    load_dotenv()
+    from yaml import CSafeLoader as _YamlLoader
 except ImportError:
-    pass
+    from yaml import SafeLoader as _YamlLoader
+
+@lru_cache(maxsize=None)
+def _load_dotenv() -> None:
+    """加载 .env 文件（首次读取配置时执行一次，未安装 python-dotenv 时跳过）"""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
 
 
 # ============ CPU 核心数自动检测 ============
@@ -82,6 +91,7 @@ def get_default_cores() -> int:
     1. CPU_CORES 环境变量（允许手动覆盖）
     2. 自动检测的 80% CPU 核心数
     """
+    _load_dotenv()
     env_cores = os.environ.get('CPU_CORES')
     if env_cores:
         try:
@@ -109,29 +119,42 @@ def _find_settings_file() -> Optional[Path]:
 
 # 缓存配置
 _settings_cache: Optional[Dict[str, Any]] = None
+# 扁平化配置: 'database.pool.min_size' -> 1（中间层级也保留，如 'database.pool' -> {...}）
+_flat_cache: Optional[Dict[str, Any]] = None
 
 
 def _load_yaml() -> Dict[str, Any]:
     """加载 YAML 配置文件"""
+    _load_dotenv()
     settings_file = _find_settings_file()
     if settings_file and settings_file.exists():
         with open(settings_file, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f) or {}
+            return yaml.load(f, Loader=_YamlLoader) or {}
     return {}
 
 
-def _get_env_override(section: str, key: str) -> Optional[str]:
-    """获取环境变量覆盖值"""
-    env_key = f"PEPTIDE_{section.upper()}_{key.upper()}"
-    return os.environ.get(env_key)
+_ENV_OVERRIDE_PREFIX = "PEPTIDE_"
 
 
 def _apply_env_overrides(config: Dict[str, Any]) -> Dict[str, Any]:
-    """应用环境变量覆盖"""
+    """
+    应用环境变量覆盖
+    
+    先一次性收集 PEPTIDE_ 前缀的环境变量，没有设置时直接返回，
+    否则逐项查这个小字典，而不是对每个配置项查询 os.environ
+    """
+    overrides = {
+        env_key: env_value
+        for env_key, env_value in os.environ.items()
+        if env_key.startswith(_ENV_OVERRIDE_PREFIX)
+    }
+    if not overrides:
+        return config
+    
     for section, values in config.items():
         if isinstance(values, dict):
             for key, value in values.items():
-                env_value = _get_env_override(section, key)
+                env_value = overrides.get(f"{_ENV_OVERRIDE_PREFIX}{section.upper()}_{key.upper()}")
                 if env_value is not None:
                     # 尝试转换类型
                     if isinstance(value, bool):
@@ -153,11 +176,67 @@ def get_settings() -> Dict[str, Any]:
     return _settings_cache
 
 
+def _flatten(data: Dict[str, Any], prefix: str, out: Dict[str, Any]) -> Dict[str, Any]:
+    """递归展开嵌套字典为点分隔键"""
+    for key, value in data.items():
+        flat_key = f"{prefix}{key}"
+        out[flat_key] = value
+        if isinstance(value, dict):
+            _flatten(value, f"{flat_key}.", out)
+    return out
+
+
+# 专用环境变量覆盖表: (环境变量名, 配置节, 配置键)，优先级高于 settings.yaml 及 PEPTIDE_ 前缀变量
+_ENV_OVERLAY = (
+    ('DB_HOST', 'database', 'host'),
+    ('DB_PORT', 'database', 'port'),
+    ('DB_USER', 'database', 'user'),
+    ('DB_PASSWORD', 'database', 'password'),
+    ('DB_NAME', 'database', 'database'),
+    ('SEAWEED_API_TYPE', 'storage', 'api_type'),
+    ('SEAWEED_FILER_ENDPOINT', 'storage', 'filer_endpoint'),
+    ('SEAWEED_BUCKET', 'storage', 'bucket'),
+    ('SEAWEED_S3_ENDPOINT', 'storage', 's3_endpoint'),
+    ('SEAWEED_ACCESS_KEY', 'storage', 'access_key'),
+    ('SEAWEED_SECRET_KEY', 'storage', 'secret_key'),
+    ('TEMP_DIR', 'storage', 'temp_dir'),
+    ('PRESIGNED_URL_EXPIRES', 'storage', 'presigned_url_expires'),
+    ('POLL_INTERVAL', 'task_processor', 'poll_interval'),
+    ('TASK_NOTIFY_CHANNEL', 'task_processor', 'notify_channel'),
+    ('MAX_CONCURRENT_TASKS', 'task_processor', 'max_workers'),
+)
+
+
+def _get_flat_settings() -> Dict[str, Any]:
+    """
+    获取扁平化配置（带缓存）
+    
+    构建时一次性叠加 _ENV_OVERLAY 中已设置的环境变量，之后的查找只访问这一个字典
+    """
+    global _flat_cache
+    if _flat_cache is None:
+        flat = _flatten(get_settings(), "", {})
+        environ = os.environ
+        for env_key, section, key in _ENV_OVERLAY:
+            if env_key in environ:
+                flat[f"{section}.{key}"] = environ[env_key]
+        _flat_cache = flat
+    return _flat_cache
+
+
 def reload_settings() -> Dict[str, Any]:
-    """重新加载配置"""
-    global _settings_cache
-    _settings_cache = None
-    return get_settings()
+    """
+    重新加载配置（重新解析 YAML）
+    
+    同时丢弃类型化配置单例及兼容访问器缓存的配置对象，下次访问时按新配置重建
+    """
+    global _settings_cache, _flat_cache, _settings
+    _settings_cache = _apply_env_overrides(_load_yaml())
+    _flat_cache = None
+    _settings = None
+    for name in _COMPAT_SECTIONS:
+        globals().pop(name, None)
+    return _settings_cache
 
 
 def get(section: str, key: str = None, default: Any = None) -> Any:
@@ -169,29 +248,28 @@ def get(section: str, key: str = None, default: Any = None) -> Any:
         key: 配置键名 (可选，不提供则返回整个节)
         default: 默认值
     """
-    settings = get_settings()
-    section_data = settings.get(section, {})
-    
     if key is None:
+        section_data = get_settings().get(section, {})
         return section_data if section_data else default
     
-    # 支持嵌套键 (如 'pool.min_size')
-    if '.' in key:
-        keys = key.split('.')
-        result = section_data
-        for k in keys:
-            if isinstance(result, dict):
-                result = result.get(k)
-            else:
-                return default
-        return result if result is not None else default
-    
-    return section_data.get(key, default)
+    # 嵌套键 (如 'pool.min_size') 与普通键一样，直接查扁平化后的字典
+    value = _get_flat_settings().get(f"{section}.{key}", default)
+    if value is None and '.' in key:
+        return default
+    return value
+
+
+@lru_cache(maxsize=None)
+def _ensure_dir(path: str) -> Path:
+    """创建目录并记住结果，同一路径之后的调用不再访问文件系统"""
+    dir_path = Path(path)
+    dir_path.mkdir(parents=True, exist_ok=True)
+    return dir_path
 
 
 # ============ 类型安全的配置类 ============
 
-@dataclass
+@dataclass(frozen=True)
 class ServerSettings:
     """服务器配置"""
     host: str = "0.0.0.0"
@@ -211,7 +289,7 @@ class ServerSettings:
         )
 
 
-@dataclass
+@dataclass(frozen=True)
 class DatabaseSettings:
     """数据库配置"""
     host: str = "127.0.0.1"
@@ -221,17 +299,24 @@ class DatabaseSettings:
     database: str = "mydatabase"
     pool_min_size: int = 1
     pool_max_size: int = 5
+    # API 连接池单条语句的超时（秒），None 表示不限制；任务处理器的连接池不使用
+    command_timeout: Optional[float] = None
+    # 会话级 JIT 开关（PostgreSQL 11+），None 表示沿用服务端配置
+    jit: Optional[bool] = None
     
     @classmethod
     def from_config(cls) -> "DatabaseSettings":
+        command_timeout = get('database', 'command_timeout', cls.command_timeout)
         return cls(
-            host=os.getenv('DB_HOST', get('database', 'host', cls.host)),
-            port=int(os.getenv('DB_PORT', get('database', 'port', cls.port))),
-            user=os.getenv('DB_USER', get('database', 'user', cls.user)),
-            password=os.getenv('DB_PASSWORD', get('database', 'password', cls.password)),
-            database=os.getenv('DB_NAME', get('database', 'database', cls.database)),
+            host=get('database', 'host', cls.host),
+            port=int(get('database', 'port', cls.port)),
+            user=get('database', 'user', cls.user),
+            password=get('database', 'password', cls.password),
+            database=get('database', 'database', cls.database),
             pool_min_size=get('database', 'pool.min_size', cls.pool_min_size),
             pool_max_size=get('database', 'pool.max_size', cls.pool_max_size),
+            command_timeout=float(command_timeout) if command_timeout is not None else None,
+            jit=get('database', 'jit', cls.jit),
         )
     
     def to_dict(self) -> Dict[str, Any]:
@@ -245,7 +330,7 @@ class DatabaseSettings:
         }
 
 
-@dataclass
+@dataclass(frozen=True)
 class StorageSettings:
     """存储配置 (SeaweedFS)"""
     api_type: str = "filer"
@@ -260,36 +345,38 @@ class StorageSettings:
     @classmethod
     def from_config(cls) -> "StorageSettings":
         return cls(
-            api_type=os.getenv('SEAWEED_API_TYPE', get('storage', 'api_type', cls.api_type)),
-            filer_endpoint=os.getenv('SEAWEED_FILER_ENDPOINT', get('storage', 'filer_endpoint', cls.filer_endpoint)),
-            bucket=os.getenv('SEAWEED_BUCKET', get('storage', 'bucket', cls.bucket)),
-            s3_endpoint=os.getenv('SEAWEED_S3_ENDPOINT', get('storage', 's3_endpoint', cls.s3_endpoint)),
-            access_key=os.getenv('SEAWEED_ACCESS_KEY', get('storage', 'access_key', cls.access_key)),
-            secret_key=os.getenv('SEAWEED_SECRET_KEY', get('storage', 'secret_key', cls.secret_key)),
-            temp_dir=os.getenv('TEMP_DIR', get('storage', 'temp_dir', cls.temp_dir)),
-            presigned_url_expires=int(os.getenv('PRESIGNED_URL_EXPIRES', get('storage', 'presigned_url_expires', cls.presigned_url_expires))),
+            api_type=get('storage', 'api_type', cls.api_type),
+            filer_endpoint=get('storage', 'filer_endpoint', cls.filer_endpoint),
+            bucket=get('storage', 'bucket', cls.bucket),
+            s3_endpoint=get('storage', 's3_endpoint', cls.s3_endpoint),
+            access_key=get('storage', 'access_key', cls.access_key),
+            secret_key=get('storage', 'secret_key', cls.secret_key),
+            temp_dir=get('storage', 'temp_dir', cls.temp_dir),
+            presigned_url_expires=int(get('storage', 'presigned_url_expires', cls.presigned_url_expires)),
         )
     
     def get_temp_path(self) -> Path:
-        """获取临时目录路径"""
-        path = Path(self.temp_dir)
-        path.mkdir(parents=True, exist_ok=True)
-        return path
+        """获取临时目录路径（目录只在首次获取时创建）"""
+        return _ensure_dir(self.temp_dir)
 
 
-@dataclass
+@dataclass(frozen=True)
 class TaskProcessorSettings:
     """任务处理器配置"""
     poll_interval: int = 30
+    notify_channel: str = "new_task"
+    max_workers: int = 1
     
     @classmethod
     def from_config(cls) -> "TaskProcessorSettings":
         return cls(
-            poll_interval=int(os.getenv('POLL_INTERVAL', get('task_processor', 'poll_interval', cls.poll_interval))),
+            poll_interval=int(get('task_processor', 'poll_interval', cls.poll_interval)),
+            notify_channel=get('task_processor', 'notify_channel', cls.notify_channel),
+            max_workers=int(get('task_processor', 'max_workers', cls.max_workers)),
         )
 
 
-@dataclass
+@dataclass(frozen=True)
 class Settings:
     """全局配置"""
     server: ServerSettings = field(default_factory=ServerSettings.from_config)
@@ -308,7 +395,7 @@ class Settings:
         )
 
 
-# 单例配置实例 (延迟加载)
+# 单例配置实例 (延迟加载)；各配置节为不可变 dataclass，加载后字段访问即普通属性读取
 _settings: Optional[Settings] = None
 
 
@@ -320,37 +407,14 @@ def settings() -> Settings:
     return _settings
 
 
-# 兼容旧代码的便捷访问器
-class _DatabaseProxy:
-    @property
-    def host(self): return settings().database.host
-    @property
-    def port(self): return settings().database.port
-    @property
-    def user(self): return settings().database.user
-    @property
-    def password(self): return settings().database.password
-    @property
-    def database(self): return settings().database.database
-
-
-class _StorageProxy:
-    @property
-    def filer_endpoint(self): return settings().storage.filer_endpoint
-    @property
-    def bucket(self): return settings().storage.bucket
-    @property
-    def temp_dir(self): return settings().storage.temp_dir
-
-
-class _TaskProcessorProxy:
-    @property
-    def max_workers(self): return settings().task_processor.max_workers
-    @property
-    def poll_interval(self): return settings().task_processor.poll_interval
-
-
-# 兼容旧代码的实例
-database = _DatabaseProxy()
-storage = _StorageProxy()
-task_processor = _TaskProcessorProxy()
+# 兼容旧代码的便捷访问器: settings.database / settings.storage / settings.task_processor
+# 首次访问时取对应的配置对象并缓存为模块全局变量，之后的访问不再经过 __getattr__ (PEP 562)
+_COMPAT_SECTIONS = ('database', 'storage', 'task_processor')
+
+
+def __getattr__(name: str) -> Any:
+    if name in _COMPAT_SECTIONS:
+        value = getattr(settings(), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,7 +4,15 @@ Core 核心模块
 包含肽段优化的核心业务逻辑
 """
 
-from peptide_opt.core.optimizer import PeptideOptimizer
 from peptide_opt.core.validators import validate_fasta_file, validate_pdb_file
 
 __all__ = ["PeptideOptimizer", "validate_fasta_file", "validate_pdb_file"]
+
+
+def __getattr__(name):
+    # PeptideOptimizer 依赖 PyMOL/Biopython/pandas，首次访问时才导入，
+    # 只使用 validators 的模块（如任务处理器、API）不必承担这部分导入开销
+    if name == "PeptideOptimizer":
+        from peptide_opt.core.optimizer import PeptideOptimizer
+        return PeptideOptimizer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,18 +5,231 @@ Peptide Optimization Pipeline
 """
 
 import os
+import re
 import sys
 import subprocess
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache, partial
 from pathlib import Path
-from Bio.PDB import PDBParser, PDBIO, Select, StructureBuilder
-from Bio.PDB.Chain import Chain
-from Bio.PDB.Residue import Residue
-from Bio.PDB.Atom import Atom
+from Bio.PDB import PDBParser, PDBIO, Select
+from Bio.Data.IUPACData import protein_weights
 from Bio.SeqUtils.ProtParam import ProteinAnalysis
-import pandas as pd
-from pymol import cmd
-import copy
+from Bio.SeqUtils.ProtParamData import kd
+import numpy as np
+
+
+# Hopp-Woods hydrophilicity scale
+HOPP_WOODS = {
+    'A': -0.5, 'R': 3.0, 'N': 0.2, 'D': 3.0,
+    'C': -1.0, 'Q': 0.2, 'E': 3.0, 'G': 0.0,
+    'H': -0.5, 'I': -1.8, 'L': -1.8, 'K': 3.0,
+    'M': -1.3, 'F': -2.5, 'P': 0.0, 'S': 0.3,
+    'T': -0.4, 'W': -3.4, 'Y': -2.3, 'V': -1.5
+}
+
+
+def _build_scale_lut(scale):
+    """将氨基酸标度表转换为按 ASCII 码索引的查找表，未知残基取 0"""
+    lut = np.zeros(256, dtype=np.float64)
+    for aa, value in scale.items():
+        lut[ord(aa)] = value
+    return lut
+
+
+_HOPP_WOODS_LUT = _build_scale_lut(HOPP_WOODS)
+
+# 分子量/GRAVY/芳香性查找表，取值与 ProteinAnalysis 默认（平均质量、Kyte-Doolittle）一致
+_WATER_MASS = 18.0153
+_MW_LUT = _build_scale_lut(protein_weights)
+_KD_LUT = _build_scale_lut(kd)
+_STANDARD_MASK = _build_scale_lut(dict.fromkeys(kd, 1.0)).astype(bool)
+_AROMATIC_CODES = [ord(aa) for aa in 'FWY']
+
+# ProteinMPNN 输出 FASTA 头部中的 global_score 字段
+_GLOBAL_SCORE_RE = re.compile(r'global_score=([-+\d.eE]+)')
+
+# 结果报告中的数值列
+_NUMERIC_RESULT_COLUMNS = (
+    'Original sequence affinity score',
+    'Original sequence global score',
+    'Global score',
+    'Molecular weight',
+    'Isoelectric point',
+    'Aromaticity',
+    'Instability index',
+    'Hydrophobicity',
+    'Hydrophilicity',
+)
+
+# 合并结构中受体蛋白链的链 ID（肽段固定为 'A'）
+_PROTEIN_CHAIN_IDS = 'BCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def _remap_chain_lines(pdb_path, chain_ids):
+    """
+    读取PDB文件中的 ATOM/HETATM 记录并按出现顺序把链 ID 依次替换为 chain_ids
+
+    返回 (记录行列表, 各链最后一个原子行的下标)，只处理第一个模型
+    """
+    mapping = {}
+    lines = []
+    chain_ends = []
+    with open(pdb_path, 'r') as file_in:
+        for line in file_in:
+            if line.startswith(('ATOM', 'HETATM')):
+                original_id = line[21]
+                new_id = mapping.get(original_id)
+                if new_id is None:
+                    if len(mapping) >= len(chain_ids):
+                        raise ValueError("Too many chains for simple letter IDs.")
+                    new_id = mapping[original_id] = chain_ids[len(mapping)]
+                if lines and lines[-1][21] != new_id:
+                    chain_ends.append(len(lines) - 1)
+                lines.append(line[:21] + new_id + line[22:].rstrip('\r\n'))
+            elif line.startswith('ENDMDL'):
+                break
+    if lines:
+        chain_ends.append(len(lines) - 1)
+    return lines, chain_ends
+
+
+def _write_merged_pdb(output_pdb, blocks):
+    """
+    按顺序写出各链记录，重新编号原子序号并在每条链末尾写 TER
+
+    编号与 TER/END 记录的写法与 Biopython PDBIO 一致：TER 取下一个序号但不占用，
+    其后第一个原子沿用该序号
+    """
+    out = []
+    serial = 0
+    for lines, chain_ends in blocks:
+        ends = set(chain_ends)
+        for index, line in enumerate(lines):
+            serial += 1
+            out.append('%s%5d%s\n' % (line[:6], serial % 100000, line[11:]))
+            if index in ends:
+                ter = 'TER   %5d      %s %s%s' % (
+                    (serial + 1) % 100000, line[17:20], line[21], line[22:27])
+                out.append(ter.ljust(80) + '\n')
+    out.append('END   \n')
+    with open(output_pdb, 'w') as file_out:
+        file_out.write(''.join(out))
+
+
+def _fast_copy(src, dst):
+    """
+    复制文件内容：Linux 上用 os.copy_file_range 在内核内完成复制，
+    不支持时（非 Linux、内核过旧或文件系统不支持）退回 shutil.copyfile
+    """
+    copy_file_range = getattr(os, 'copy_file_range', None)
+    if copy_file_range is not None:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            try:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                # 提前返回 0（如文件在复制过程中被截断或文件系统不支持）时不能留下不完整的目标文件
+                if remaining == 0:
+                    return
+            except OSError:
+                pass
+    shutil.copyfile(src, dst)
+
+
+def _stage_file(src, dst):
+    """将文件放到目标位置：同一文件系统内建立硬链接，跨文件系统时退回到复制"""
+    try:
+        os.unlink(dst)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, dst)
+    except OSError:
+        _fast_copy(src, dst)
+
+
+@lru_cache(maxsize=32)
+def _protein_properties(seq):
+    """
+    计算序列的理化性质，返回 (分子量, 等电点, 芳香性, 不稳定指数, GRAVY, 二级结构比例)
+    
+    按序列缓存：不同构象常得到相同的优化序列，无需重复计算
+    """
+    # 一次统计残基组成，分子量/GRAVY/芳香性直接由查找表算出，避免 ProteinAnalysis 反复遍历序列
+    residues = np.frombuffer(seq.upper().encode('ascii', 'replace'), dtype=np.uint8)
+    counts = np.bincount(residues, minlength=256)
+    if counts[~_STANDARD_MASK].any():
+        raise ValueError(f"Sequence contains non-standard amino acids: {seq}")
+    length = len(seq)
+    mw = float(counts @ _MW_LUT) - (length - 1) * _WATER_MASS
+    gra = float(counts @ _KD_LUT) / length
+    aro = float(counts[_AROMATIC_CODES].sum()) / length
+    
+    analysis = ProteinAnalysis(seq)
+    ip = analysis.isoelectric_point()
+    ins = analysis.instability_index()
+    sec = analysis.secondary_structure_fraction()
+    return mw, ip, aro, ins, gra, sec
+
+
+def _hydrophilicity(sequence, scale=None):
+    """按给定标度计算序列的平均亲水性，scale 为 None 时使用 Hopp-Woods 标度"""
+    lut = _HOPP_WOODS_LUT if scale is None else _build_scale_lut(scale)
+    residues = np.frombuffer(sequence.encode('ascii', 'replace'), dtype=np.uint8)
+    return float(lut[residues].mean()) if residues.size else 0.0
+
+
+def _sequence_properties(seq, scale=None):
+    """返回 (分子量, 等电点, 芳香性, 不稳定指数, GRAVY, 亲水性, 二级结构比例)"""
+    mw, ip, aro, ins, gra, sec = _protein_properties(seq)
+    return mw, ip, aro, ins, gra, _hydrophilicity(seq, scale), sec
+
+
+def _optimal_sequence(fasta_path):
+    """从 ProteinMPNN 输出的FASTA文件中找到最优序列，返回 (原始得分, 最优序列, 最优得分)"""
+    with open(fasta_path, 'r') as file_in:
+        # 前两行为原始序列的头部和序列
+        org_gscore = float(_GLOBAL_SCORE_RE.search(next(file_in)).group(1))
+        next(file_in)
+
+        # 其余为 ProteinMPNN 采样结果：头部携带得分，下一行为序列
+        seq_dict = {}
+        gscore = None
+        for line in file_in:
+            if line.startswith('>'):
+                gscore = float(_GLOBAL_SCORE_RE.search(line).group(1))
+            else:
+                seq = line.strip()
+                if seq:
+                    seq_dict[seq] = gscore
+
+    # 反向遍历，得分相同时与原先稳定排序取末项的结果一致
+    opt_seq, opt_gscore = max(reversed(seq_dict.items()), key=lambda item: item[1])
+    return org_gscore, opt_seq, opt_gscore
+
+
+def _analyze_complex(fasta_path, scale=None):
+    """分析单个复合物的 ProteinMPNN 结果"""
+    org_gscore, opt_seq, opt_gscore = _optimal_sequence(fasta_path)
+    return org_gscore, opt_seq, opt_gscore, _sequence_properties(opt_seq, scale)
+
+
+# 各步骤对应的方法名，下标即步骤编号 (1-8)
+_STEP_NAMES = (
+    None,
+    "step1_model_peptide",
+    "step2_add_hydrogens",
+    "step3_docking",
+    "step4_sort_atoms",
+    "step5_score_binding",
+    "step6_merge_structures",
+    "step7_proteinmpnn_optimization",
+    "step8_final_analysis",
+)
 
 
 class PeptideOptimizer:
@@ -53,55 +266,64 @@ class PeptideOptimizer:
         self.pmpnn_dir = self.middle_dir / "pmpnn"
 
         # Hopp-Woods hydrophilicity scale
-        self.hopp_woods = {
-            'A': -0.5, 'R': 3.0, 'N': 0.2, 'D': 3.0,
-            'C': -1.0, 'Q': 0.2, 'E': 3.0, 'G': 0.0,
-            'H': -0.5, 'I': -1.8, 'L': -1.8, 'K': 3.0,
-            'M': -1.3, 'F': -2.5, 'P': 0.0, 'S': 0.3,
-            'T': -0.4, 'W': -3.4, 'Y': -2.3, 'V': -1.5
-        }
+        self.hopp_woods = HOPP_WOODS
         
         # 创建必要的目录
         self.output_dir.mkdir(exist_ok=True)
         self.middle_dir.mkdir(exist_ok=True)
         
         # 输出初始化参数到日志
-        self.log("=== PEPTIDE OPTIMIZER INITIALIZATION ===")
-        self.log(f"Input Directory: {self.input_dir}")
-        self.log(f"Output Directory: {self.output_dir}")
-        self.log(f"Middle Files Directory: {self.middle_dir}")
-        self.log(f"ProteinMPNN Directory: {self.proteinmpnn_dir}")
-        self.log(f"Receptor PDB Filename: {self.receptor_pdb_filename}")
-        self.log(f"CPU Cores: {self.cores}")
-        self.log(f"Number of Docking Poses: {self.n_poses}")
-        self.log(f"ProteinMPNN Sequences per Target: {self.num_seq_per_target}")
-        self.log(f"ProteinMPNN Random Seed: {self.proteinmpnn_seed}")
-        self.log(f"Cleanup Intermediate Files: {self.cleanup}")
-        self.log("==========================================")
+        self.log_lines([
+            "=== PEPTIDE OPTIMIZER INITIALIZATION ===",
+            f"Input Directory: {self.input_dir}",
+            f"Output Directory: {self.output_dir}",
+            f"Middle Files Directory: {self.middle_dir}",
+            f"ProteinMPNN Directory: {self.proteinmpnn_dir}",
+            f"Receptor PDB Filename: {self.receptor_pdb_filename}",
+            f"CPU Cores: {self.cores}",
+            f"Number of Docking Poses: {self.n_poses}",
+            f"ProteinMPNN Sequences per Target: {self.num_seq_per_target}",
+            f"ProteinMPNN Random Seed: {self.proteinmpnn_seed}",
+            f"Cleanup Intermediate Files: {self.cleanup}",
+            "==========================================",
+        ])
         
     def log(self, message):
         """日志输出"""
         print(f"[PeptideOptimizer] {message}")
         
+    def log_lines(self, lines):
+        """多行日志一次性输出（每行带相同前缀），避免逐行调用 print"""
+        print("\n".join(f"[PeptideOptimizer] {line}" for line in lines))
+        
     def update_progress(self, progress, message):
         """更新进度"""
         if self.progress_callback:
             self.progress_callback(progress, message)
         self.log(f"Progress {progress:.1f}%: {message}")
         
-    def run_command(self, command, description=""):
-        """执行系统命令"""
+    def run_command(self, command, description="", cwd=None):
+        """执行系统命令（字符串经 shell 执行，列表则直接执行）"""
         if description:
             self.log(f"{description}")
-        self.log(f"Running: {command}")
+        if not isinstance(command, str):
+            command = [str(arg) for arg in command]
+        self.log(f"Running: {command if isinstance(command, str) else ' '.join(command)}")
         
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
+        result = subprocess.run(command, shell=isinstance(command, str), cwd=cwd,
+                                capture_output=True, text=True)
         if result.returncode != 0:
             self.log(f"Error in command: {command}")
             self.log(f"Error output: {result.stderr}")
             raise RuntimeError(f"Command failed: {command}")
         return result
         
+    def read_peptide_sequence(self):
+        """读取输入肽段序列（FASTA 第二行），只读取前两行而不加载整个文件"""
+        with open(self.input_dir / "peptide.fasta", 'r') as f:
+            f.readline()
+            return f.readline().strip()
+        
     def step1_model_peptide(self):
         """步骤1: 使用OmegaFold预测肽段结构"""
         self.log("Step 1: Modeling peptide structure with OmegaFold")
@@ -133,222 +355,164 @@ class PeptideOptimizer:
         io.set_structure(structure)
         io.save(str(output_pdb), select=NoHetatmSelect())
 
-        # 使用PyMOL添加氢原子
+        # 使用PyMOL添加氢原子（仅在用到时导入，纯文本/序列辅助函数不依赖 PyMOL）
+        from pymol import cmd
         cmd.load(str(output_pdb))
         cmd.remove("elem H")
         cmd.h_add("all")
         cmd.save(str(self.middle_dir / "receptorH.pdb"))
-        cmd.reinitialize()
+        # 只清除对象，保留 PyMOL 引擎状态，避免 reinitialize 的冷启动开销
+        cmd.delete("all")
 
         cmd.load(str(self.middle_dir / "peptide.pdb"))
         cmd.remove("elem H")
         cmd.h_add("all")
         cmd.save(str(self.middle_dir / "peptideH.pdb"))
-        cmd.reinitialize()
+        cmd.delete("all")
         
     def step3_docking(self):
         """步骤3: 分子对接"""
         self.log("Step 3: Molecular docking")
         
         # 读取肽段序列
-        peptide_fasta = self.input_dir / "peptide.fasta"
-        with open(peptide_fasta, 'r') as f:
-            lines = f.readlines()
-            peptide_seq = lines[1].strip()
-        
-        # 切换到中间文件目录进行操作
-        original_cwd = os.getcwd()
-        os.chdir(self.middle_dir)
-        
-        try:
-            # 准备受体和配体
-            self.update_progress(56, "Preparing receptor structure")
-            commands = [
-                "prepare_receptor -r receptorH.pdb -o receptorH.pdbqt",
-            ]
-            
-            for command in commands:
-                self.run_command(command)
-                
-            self.update_progress(57, "Preparing ligand structure")
-            commands = [
-                "prepare_ligand -l peptideH.pdb -o peptideH.pdbqt",
-            ]
+        peptide_seq = self.read_peptide_sequence()
+        
+        # ADFRsuite 工具使用相对文件名，统一在中间文件目录中运行（通过 cwd 指定，不切换进程工作目录）
+        # 准备受体和配体（两者互不依赖，并行执行以重叠 ADFRsuite 的启动开销）
+        self.update_progress(56, "Preparing receptor and ligand structures")
+        commands = [
+            "prepare_receptor -r receptorH.pdb -o receptorH.pdbqt",
+            "prepare_ligand -l peptideH.pdb -o peptideH.pdbqt",
+        ]
+        
+        with ThreadPoolExecutor(max_workers=len(commands)) as executor:
+            list(executor.map(partial(self.run_command, cwd=self.middle_dir), commands))
             
-            for command in commands:
-                self.run_command(command)
-                
-            self.update_progress(58, "Generating docking grid")
-            commands = [
-                "agfr -r receptorH.pdbqt -l peptideH.pdbqt -asv 1.1 -o complex",
-            ]
+        self.update_progress(58, "Generating docking grid")
+        commands = [
+            "agfr -r receptorH.pdbqt -l peptideH.pdbqt -asv 1.1 -o complex",
+        ]
+        
+        for command in commands:
+            self.run_command(command, cwd=self.middle_dir)
             
-            for command in commands:
-                self.run_command(command)
-                
-            self.update_progress(60, f"Running molecular docking ({self.n_poses} poses)")
-            commands = [
-                f"adcp -t complex.trg -s {peptide_seq} -N {self.n_poses} -c {self.cores} -o ./peptide"
-            ]
+        self.update_progress(60, f"Running molecular docking ({self.n_poses} poses)")
+        commands = [
+            f"adcp -t complex.trg -s {peptide_seq} -N {self.n_poses} -c {self.cores} -o ./peptide"
+        ]
+        
+        for command in commands:
+            self.run_command(command, cwd=self.middle_dir)
             
-            for command in commands:
-                self.run_command(command)
-                
-            # 检测 adcp 实际生成的 poses 数量
-            actual_poses = 0
-            for i in range(1, self.n_poses + 1):
-                if (self.middle_dir / f'peptide_ranked_{i}.pdb').exists():
-                    actual_poses = i
-                else:
-                    break
+        # 检测 adcp 实际生成的 poses 数量
+        actual_poses = 0
+        for i in range(1, self.n_poses + 1):
+            if (self.middle_dir / f'peptide_ranked_{i}.pdb').exists():
+                actual_poses = i
+            else:
+                break
+        
+        if actual_poses < self.n_poses:
+            self.log(f"Warning: adcp only generated {actual_poses} poses (requested {self.n_poses})")
+            self.n_poses = actual_poses  # 更新为实际生成的数量
             
-            if actual_poses < self.n_poses:
-                self.log(f"Warning: adcp only generated {actual_poses} poses (requested {self.n_poses})")
-                self.n_poses = actual_poses  # 更新为实际生成的数量
-                
-            if actual_poses == 0:
-                raise RuntimeError("adcp failed to generate any poses")
-                
-        finally:
-            # 恢复原始工作目录
-            os.chdir(original_cwd)
+        if actual_poses == 0:
+            raise RuntimeError("adcp failed to generate any poses")
             
     def step4_sort_atoms(self):
         """步骤4: 原子排序和添加氢原子"""
         self.log("Step 4: Sorting atoms and adding hydrogens")
         
+        from pymol import cmd
+        
+        # PyMOL 加载时即按自身顺序组织原子，无需先经 Biopython 重写一遍
         for i in range(1, self.n_poses + 1):
-            parser = PDBParser(QUIET=True)
+            obj = f"pose{i}"
             input_file = self.middle_dir / f'peptide_ranked_{i}.pdb'
-            structure = parser.get_structure("A", str(input_file))
-
-            io = PDBIO()
-            io.set_structure(structure)
-            sorted_file = self.middle_dir / f'peptide_ranked_{i}_sorted.pdb'
-            io.save(str(sorted_file))
-
-            cmd.load(str(sorted_file))
-            cmd.remove("elem H")
-            cmd.h_add("all")
+            cmd.load(str(input_file), obj)
+            cmd.remove(f"{obj} and elem H")
+            cmd.h_add(obj)
             sorted_h_file = self.middle_dir / f'peptide_ranked_{i}_sorted_H.pdb'
-            cmd.save(str(sorted_h_file))
-            cmd.reinitialize()
+            cmd.save(str(sorted_h_file), obj)
+            cmd.delete(obj)
             
+    def _score_pose(self, i):
+        """对单个构象准备配体并用 vina 评分，返回 (i, 亲和力列表)"""
+        input_filename = f'peptide_ranked_{i}_sorted_H.pdb'
+        output_filename = f'peptide_ranked_{i}_sorted_H.pdbqt'
+        input_file = self.middle_dir / input_filename
+        output_file = self.middle_dir / output_filename
+        
+        # 检查输入文件是否存在
+        if not input_file.exists():
+            self.log(f"Warning: Input file does not exist: {input_file}")
+            return i, []
+        
+        # 在中间文件目录中准备配体（通过 cwd 指定，避免并发时切换进程工作目录）
+        self.run_command(
+            ["prepare_ligand", "-l", input_filename, "-o", output_filename],
+            cwd=self.middle_dir
+        )
+        
+        # 使用vina评分，每个进程限定单核以便多个构象并行
+        receptor_pdbqt = self.middle_dir / "receptorH.pdbqt"
+        cmd = [
+            "vina",
+            "--ligand", str(output_file.resolve()),
+            "--receptor", str(receptor_pdbqt.resolve()),
+            "--score_only",
+            "--autobox",
+            "--cpu", "1"
+        ]
+        
+        # --score_only 只做一次打分，搜索参数无效；只需 stdout 中的 Affinity 行
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            self.log(f"Error in command: {' '.join(cmd)}")
+            self.log(f"Error output: {result.stderr.decode(errors='replace')}")
+            raise RuntimeError(f"Command failed: {' '.join(cmd)}")
+        scores = [l.strip().split()[1] for l in result.stdout.decode().splitlines() if "Affinity:" in l]
+        return i, scores
+        
     def step5_score_binding(self):
         """步骤5: 计算结合亲和力评分"""
         self.log("Step 5: Calculating binding affinity scores")
         
-        # 保存当前工作目录
-        original_cwd = os.getcwd()
+        # 各构象相互独立，并行执行配体准备和评分
+        results = []
+        max_workers = max(1, min(self.n_poses, self.cores))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._score_pose, i) for i in range(1, self.n_poses + 1)]
+            for future in as_completed(futures):
+                results.append(future.result())
         
+        # 按构象编号排序后一次性写入，保证输出顺序与串行版本一致
         score_file = self.middle_dir / f'score_rank_1_{self.n_poses}.dat'
+        lines = ''.join('%3d %15s\n' % (i, score) for i, scores in sorted(results) for score in scores)
         with open(score_file, 'w') as file_out:
-            for i in range(1, self.n_poses + 1):
-                input_filename = f'peptide_ranked_{i}_sorted_H.pdb'
-                output_filename = f'peptide_ranked_{i}_sorted_H.pdbqt'
-                input_file = self.middle_dir / input_filename
-                output_file = self.middle_dir / output_filename
-                
-                # 检查输入文件是否存在
-                if not input_file.exists():
-                    self.log(f"Warning: Input file does not exist: {input_file}")
-                    continue
-                
-                # 切换到中间文件目录执行prepare_ligand
-                os.chdir(self.middle_dir)
-                
-                try:
-                    # 准备配体，使用相对路径
-                    prepare_cmd = f'prepare_ligand -l {input_filename} -o {output_filename}'
-                    self.run_command(prepare_cmd)
-                finally:
-                    # 恢复原始工作目录
-                    os.chdir(original_cwd)
-                
-                # 使用vina评分
-                receptor_pdbqt = self.middle_dir / "receptorH.pdbqt"
-                cmd = [
-                    "vina",
-                    "--ligand", str(output_file.resolve()),
-                    "--receptor", str(receptor_pdbqt.resolve()),
-                    "--score_only",
-                    "--autobox",
-                    "--exhaustiveness", "1",
-                    "--num_modes", "1"
-                ]
-                
-                result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-                matches = [l for l in result.stdout.splitlines() if "Affinity:" in l]
-
-                for match in matches:
-                    tmp = match.strip().split()
-                    score = tmp[1]
-                    file_out.write('%3d %15s\n' % (i, score))
+            file_out.write(lines)
                     
-    def clone_and_rename_chain(self, original_chain, new_id):
-        """克隆并重命名链"""
-        new_chain = Chain(new_id)
-        for residue in original_chain:
-            new_residue = Residue(residue.id, residue.resname, residue.segid)
-            for atom in residue:
-                new_atom = Atom(
-                    atom.name,
-                    atom.coord,
-                    atom.bfactor,
-                    atom.occupancy,
-                    atom.altloc,
-                    atom.fullname.strip().ljust(4),
-                    atom.serial_number,
-                    element=atom.element,
-                )
-                new_residue.add(new_atom)
-            new_chain.add(new_residue)
-        return new_chain
-        
     def step6_merge_structures(self):
         """步骤6: 合并肽段和蛋白质结构"""
         self.log("Step 6: Merging peptide and protein structures")
         
         self.pmpnn_dir.mkdir(exist_ok=True)
         
+        # 受体对所有复合物相同，只需读取并重命名链一次（链ID为B, C, D...）
+        protein_pdb = self.middle_dir / 'receptorH.pdb'
+        protein_block = _remap_chain_lines(protein_pdb, _PROTEIN_CHAIN_IDS)
+        
         for n in range(1, self.n_poses + 1):
             complex_dir = self.pmpnn_dir / f"complex{n}"
             complex_dir.mkdir(exist_ok=True)
 
             # 输入/输出文件
             peptide_pdb = self.middle_dir / f'peptide_ranked_{n}_sorted_H.pdb'
-            protein_pdb = self.middle_dir / 'receptorH.pdb'
             output_pdb = complex_dir / 'complex.pdb'
 
-            # 解析结构
-            parser = PDBParser(QUIET=True)
-            peptide_structure = parser.get_structure("peptide", str(peptide_pdb))
-            protein_structure = parser.get_structure("protein", str(protein_pdb))
-
-            # 初始化新结构
-            builder = StructureBuilder.StructureBuilder()
-            builder.init_structure("combined")
-            builder.init_model(0)
-
-            # 添加肽段链作为'A'
-            peptide_chain = list(peptide_structure.get_chains())[0]
-            new_peptide_chain = self.clone_and_rename_chain(peptide_chain, "A")
-            builder.structure[0].add(new_peptide_chain)
-
-            # 添加蛋白质链，ID为B, C, D...
-            chain_ids = [chr(i) for i in range(ord('B'), ord('Z') + 1)]
-            protein_chains = list(protein_structure.get_chains())
-
-            for i, original_chain in enumerate(protein_chains):
-                if i >= len(chain_ids):
-                    raise ValueError("Too many chains for simple letter IDs.")
-                new_chain = self.clone_and_rename_chain(original_chain, chain_ids[i])
-                builder.structure[0].add(new_chain)
-
-            # 保存合并的结构
-            io = PDBIO()
-            io.set_structure(builder.structure)
-            io.save(str(output_pdb))
+            # 直接在文本层面合并：肽段链为'A'，其后为蛋白质链
+            peptide_block = _remap_chain_lines(peptide_pdb, 'A')
+            _write_merged_pdb(output_pdb, (peptide_block, protein_block))
 
             self.log(f"Combined structure saved to: {output_pdb}")
             
@@ -382,64 +546,36 @@ class PeptideOptimizer:
             self.log(f"complex{i} optimization completed")
             
     def calculate_hydrophilicity(self, sequence, scale=None):
-        """计算疏水性"""
-        if scale is None:
-            scale = self.hopp_woods
-        values = [scale.get(aa, 0.0) for aa in sequence]
-        return sum(values) / len(values) if values else 0.0
+        """计算疏水性（scale 为 None 时使用 Hopp-Woods 标度）"""
+        return _hydrophilicity(sequence, scale)
 
     def optimal_sequence(self, fasta_path):
         """从FASTA文件中找到最优序列"""
-        with open(fasta_path, 'r') as file_in:
-            seq_dict = {}
-            n = 0
-            for line in file_in.readlines():
-                tmp = line.strip().split(',')
-                if tmp[0] == '>complex':
-                    ttt = tmp[2][1:].strip().split('=')
-                    org_gscore = float(ttt[1])
-                if n > 1:
-                    if tmp[0][:2] == '>T':
-                        ttt = tmp[3][1:].strip().split('=')
-                        gscore = float(ttt[1])
-                    else:
-                        seq_dict[tmp[0]] = gscore
-                n += 1
-
-        sort_dict = {k: v for k, v in sorted(seq_dict.items(), key=lambda item: item[1])}
-        opt_seq, opt_gscore = list(sort_dict.items())[-1]
-        return org_gscore, opt_seq, opt_gscore
+        return _optimal_sequence(fasta_path)
 
     def analyze_sequence_properties(self, seq):
         """分析序列性质"""
-        analysis = ProteinAnalysis(seq)
-        mw = analysis.molecular_weight()
-        ip = analysis.isoelectric_point()
-        aro = analysis.aromaticity()
-        ins = analysis.instability_index()
-        gra = analysis.gravy()
-        hyd = self.calculate_hydrophilicity(seq)
-        sec = analysis.secondary_structure_fraction()
-        return mw, ip, aro, ins, gra, hyd, sec
+        return _sequence_properties(seq)
         
     def step8_final_analysis(self):
         """步骤8: 最终分析和报告生成"""
+        # pandas 仅用于生成报告，延迟导入以缩短模块加载时间
+        import pandas as pd
+        
         self.log("Step 8: Final analysis and report generation")
         
         # 读取原始序列
-        peptide_fasta = self.input_dir / "peptide.fasta"
-        with open(peptide_fasta, 'r') as f:
-            lines = f.readlines()
-            original_seq = lines[1].strip()
+        original_seq = self.read_peptide_sequence()
 
         # 分析原始序列性质
         mw, ip, aro, ins, gra, hyd, sec = self.analyze_sequence_properties(original_seq)
         
+        # 输入肽段没有的得分项用 NaN 占位，保证数值列为 float64，写出 CSV 时再显示为 '-'
         info_dict = {
-            'Original sequence affinity score': ['-'],
-            'Original sequence global score': ['-'],
+            'Original sequence affinity score': [np.nan],
+            'Original sequence global score': [np.nan],
             'Optimal sequence': [original_seq],
-            'Global score': ['-'],
+            'Global score': [np.nan],
             'Molecular weight': [mw],
             'Isoelectric point': [ip],
             'Aromaticity': [aro],
@@ -451,17 +587,18 @@ class PeptideOptimizer:
 
         # 读取亲和力评分
         score_file = self.middle_dir / f'score_rank_1_{self.n_poses}.dat'
-        with open(score_file, 'r') as file_in:
-            for line in file_in.readlines():
-                tmp = line.strip().split()
-                ascore = float(tmp[1])
-                info_dict['Original sequence affinity score'].append(ascore)
-
-        # 分析优化序列
-        for i in range(1, self.n_poses + 1):
-            fasta_path = self.pmpnn_dir / f'complex{i}' / 'seqs' / 'complex.fa'
-            org_gscore, opt_seq, opt_gscore = self.optimal_sequence(str(fasta_path))
-            mw, ip, aro, ins, gra, hyd, sec = self.analyze_sequence_properties(opt_seq)
+        scores = np.loadtxt(score_file, usecols=1, ndmin=1)
+        info_dict['Original sequence affinity score'].extend(scores.tolist())
+
+        # 分析优化序列：每条序列只是查找表运算，在本进程内依次计算，
+        # 相同序列可命中 _protein_properties 的缓存
+        results = [
+            _analyze_complex(self.pmpnn_dir / f'complex{i}' / 'seqs' / 'complex.fa')
+            for i in range(1, self.n_poses + 1)
+        ]
+
+        for org_gscore, opt_seq, opt_gscore, properties in results:
+            mw, ip, aro, ins, gra, hyd, sec = properties
             
             info_dict['Original sequence global score'].append(org_gscore)
             info_dict['Optimal sequence'].append(opt_seq)
@@ -474,19 +611,28 @@ class PeptideOptimizer:
             info_dict['Hydrophilicity'].append(hyd)
             info_dict['Secondary structure fraction (Helix, Turn, Sheet)'].append(sec)
 
-            # 复制复合物文件到输出目录
-            src = self.pmpnn_dir / f'complex{i}' / 'complex.pdb'
-            dst = self.output_dir / f'complex{i}.pdb'
-            shutil.copy2(src, dst)
+        # 复合物文件放到输出目录（优先硬链接，跨文件系统时并行复制，与报告生成重叠进行）
+        copy_pairs = [
+            (self.pmpnn_dir / f'complex{i}' / 'complex.pdb', self.output_dir / f'complex{i}.pdb')
+            for i in range(1, self.n_poses + 1)
+        ]
+        with ThreadPoolExecutor(max_workers=max(1, len(copy_pairs))) as executor:
+            copies = [executor.submit(_stage_file, src, dst) for src, dst in copy_pairs]
 
-        # 生成DataFrame和CSV报告
-        index_labels = ['Input peptide property']
-        for i in range(1, self.n_poses + 1):
-            index_labels.append(f'Docking result rank {i}')
+            # 生成DataFrame和CSV报告
+            index_labels = ['Input peptide property']
+            for i in range(1, self.n_poses + 1):
+                index_labels.append(f'Docking result rank {i}')
 
-        df = pd.DataFrame(info_dict, index=index_labels)
-        output_csv = self.output_dir / 'result.csv'
-        df.to_csv(output_csv, index_label='Index')
+            df = pd.DataFrame(info_dict, index=index_labels).astype(
+                dict.fromkeys(_NUMERIC_RESULT_COLUMNS, 'float64')
+            )
+            output_csv = self.output_dir / 'result.csv'
+            df.to_csv(output_csv, index_label='Index', na_rep='-',
+                      float_format='%.4f', lineterminator='\n')
+
+            for future in copies:
+                future.result()
         
         self.log(f"Final analysis completed. Results saved to {output_csv}")
         
@@ -504,34 +650,35 @@ class PeptideOptimizer:
         except Exception as e:
             self.log(f"Warning: Failed to clean up intermediate files: {e}")
         
+    def run_step(self, step):
+        """运行单个步骤 (1-8)"""
+        if not 1 <= step < len(_STEP_NAMES):
+            raise ValueError(f"Invalid step number: {step}. Must be 1-8.")
+        getattr(self, _STEP_NAMES[step])()
+        
     def run_full_pipeline(self):
         """运行完整的肽段优化流程"""
         self.log("Starting peptide optimization pipeline")
         
         # 读取peptide序列信息用于完整参数输出
         try:
-            peptide_fasta = self.input_dir / "peptide.fasta"
             peptide_sequence = ""
-            if peptide_fasta.exists():
-                with open(peptide_fasta, 'r') as f:
-                    lines = f.readlines()
-                    if len(lines) > 1:
-                        peptide_sequence = lines[1].strip()
+            if (self.input_dir / "peptide.fasta").exists():
+                peptide_sequence = self.read_peptide_sequence()
             
             # 输出完整的优化任务参数
-            self.log("=== PEPTIDE OPTIMIZATION TASK PARAMETERS ===")
-            self.log(f"Peptide Sequence: {peptide_sequence}")
-            self.log(f"Peptide Length: {len(peptide_sequence)} amino acids")
-            self.log(f"Number of Docking Poses: {self.n_poses}")
-            self.log(f"ProteinMPNN Sequences per Target: {self.num_seq_per_target}")
-            self.log(f"ProteinMPNN Random Seed: {self.proteinmpnn_seed}")
-            self.log(f"CPU Cores for Processing: {self.cores}")
-            self.log(f"Cleanup Intermediate Files: {self.cleanup}")
-            
-            # 检查是否有受体蛋白文件信息
-            self.log(f"Receptor PDB File: {self.receptor_pdb_filename}")
-
-            self.log("============================================")
+            self.log_lines([
+                "=== PEPTIDE OPTIMIZATION TASK PARAMETERS ===",
+                f"Peptide Sequence: {peptide_sequence}",
+                f"Peptide Length: {len(peptide_sequence)} amino acids",
+                f"Number of Docking Poses: {self.n_poses}",
+                f"ProteinMPNN Sequences per Target: {self.num_seq_per_target}",
+                f"ProteinMPNN Random Seed: {self.proteinmpnn_seed}",
+                f"CPU Cores for Processing: {self.cores}",
+                f"Cleanup Intermediate Files: {self.cleanup}",
+                f"Receptor PDB File: {self.receptor_pdb_filename}",
+                "============================================",
+            ])
             
         except Exception as e:
             self.log(f"Warning: Could not read peptide sequence information: {e}")
@@ -605,21 +752,10 @@ def main():
     
     if args.step:
         # 运行特定步骤
-        step_methods = {
-            1: optimizer.step1_model_peptide,
-            2: optimizer.step2_add_hydrogens,
-            3: optimizer.step3_docking,
-            4: optimizer.step4_sort_atoms,
-            5: optimizer.step5_score_binding,
-            6: optimizer.step6_merge_structures,
-            7: optimizer.step7_proteinmpnn_optimization,
-            8: optimizer.step8_final_analysis
-        }
-        
-        if args.step in step_methods:
-            step_methods[args.step]()
-        else:
-            print(f"Invalid step number: {args.step}. Must be 1-8.")
+        try:
+            optimizer.run_step(args.step)
+        except ValueError as e:
+            print(e)
             sys.exit(1)
     else:
         # 运行完整流程
@@ -2,9 +2,13 @@
 文件验证工具
 """
 
+import mmap
 import os
 from typing import Optional
 
+# 流式验证时每次读取的字节数
+_READ_CHUNK_SIZE = 4096
+
 
 class ValidationError(Exception):
     """验证错误"""
@@ -33,6 +37,26 @@ def validate_file_exists(file_path: str, file_type: str) -> str:
     return file_path
 
 
+def validate_fasta_bytes(content: bytes) -> bytes:
+    """
+    验证内存中的 FASTA 内容
+    
+    Args:
+        content: FASTA 文件内容
+        
+    Returns:
+        验证通过的内容
+        
+    Raises:
+        ValidationError: 格式无效时
+    """
+    if not content.lstrip().startswith(b'>'):
+        raise ValidationError(
+            "Invalid FASTA format: file should start with '>'"
+        )
+    return content
+
+
 def validate_fasta_file(file_path: str) -> str:
     """
     验证 FASTA 文件格式
@@ -49,12 +73,15 @@ def validate_fasta_file(file_path: str) -> str:
     validate_file_exists(file_path, "FASTA")
     
     try:
-        with open(file_path, 'r') as f:
-            content = f.read().strip()
-            if not content.startswith('>'):
-                raise ValidationError(
-                    "Invalid FASTA format: file should start with '>'"
-                )
+        # 只需检查第一个非空白字节，按块读取，跳过开头空白后即停止
+        with open(file_path, 'rb') as f:
+            head = b''
+            while not head:
+                chunk = f.read(_READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                head = chunk.lstrip()
+            validate_fasta_bytes(head[:1])
     except ValidationError:
         raise
     except Exception as e:
@@ -63,6 +90,17 @@ def validate_fasta_file(file_path: str) -> str:
     return file_path
 
 
+def _has_atom_records(f) -> bool:
+    """检查已打开的 PDB 文件中是否存在以 ATOM/HETATM 开头的行"""
+    if os.fstat(f.fileno()).st_size == 0:
+        return False
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return any(
+            mm[:len(record)] == record or mm.find(b'\n' + record) >= 0
+            for record in (b'ATOM', b'HETATM')
+        )
+
+
 def validate_pdb_file(file_path: str) -> str:
     """
     验证 PDB 文件格式
@@ -79,9 +117,9 @@ def validate_pdb_file(file_path: str) -> str:
     validate_file_exists(file_path, "PDB")
     
     try:
-        with open(file_path, 'r') as f:
-            content = f.read()
-            if not any(line.startswith(('ATOM', 'HETATM')) for line in content.split('\n')):
+        # 内存映射后直接查找记录前缀，找到第一条原子记录即停止，不读入整个文件也不逐行切分
+        with open(file_path, 'rb') as f:
+            if not _has_atom_records(f):
                 raise ValidationError(
                     "Invalid PDB format: no ATOM or HETATM records found"
                 )
@@ -125,3 +163,4 @@ def validate_sequence(sequence: str, min_length: int = 1, max_length: int = 1000
         )
     
     return sequence
+
@@ -4,8 +4,9 @@ PostgreSQL 数据库连接模块
 支持异步连接池 (asyncpg)
 """
 
+import asyncio
 import logging
-from typing import Optional
+from typing import Any, Dict, Optional
 
 import asyncpg
 
@@ -14,8 +15,33 @@ from peptide_opt.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# 连接池公共参数：加大预编译语句缓存，回收长时间空闲的连接
+POOL_OPTIONS = {
+    "statement_cache_size": 1024,
+    "max_inactive_connection_lifetime": 300.0,
+}
+
+
+def pool_options(db_settings, command_timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    创建连接池的参数
+    
+    在公共参数上加入服务端应用名，以及配置中的 JIT 开关（旧版本 PostgreSQL 不认识 jit，未配置时不发送）
+    
+    Args:
+        db_settings: 数据库配置
+        command_timeout: 单条语句超时（秒），None 表示不限制
+    """
+    server_settings = {"application_name": "peptide-opt"}
+    if db_settings.jit is not None:
+        server_settings["jit"] = "on" if db_settings.jit else "off"
+    return {**POOL_OPTIONS, "command_timeout": command_timeout, "server_settings": server_settings}
+
+
 # 异步连接池
 _async_pool: Optional[asyncpg.Pool] = None
+# 保证并发首次调用时只创建一个连接池
+_async_pool_lock = asyncio.Lock()
 
 
 async def get_async_pool() -> asyncpg.Pool:
@@ -27,24 +53,30 @@ async def get_async_pool() -> asyncpg.Pool:
     """
     global _async_pool
     
-    if _async_pool is None:
-        try:
-            db_settings = settings().database
-            
-            logger.info("Creating PostgreSQL async connection pool...")
-            _async_pool = await asyncpg.create_pool(
-                host=db_settings.host,
-                port=db_settings.port,
-                user=db_settings.user,
-                password=db_settings.password,
-                database=db_settings.database,
-                min_size=db_settings.pool_min_size,
-                max_size=db_settings.pool_max_size,
-            )
-            logger.info("PostgreSQL async connection pool created successfully")
-        except Exception as e:
-            logger.error(f"Failed to create PostgreSQL async connection pool: {e}")
-            raise
+    if _async_pool is not None:
+        return _async_pool
+    
+    async with _async_pool_lock:
+        # 等锁期间可能已由其他协程创建
+        if _async_pool is None:
+            try:
+                db_settings = settings().database
+                
+                logger.info("Creating PostgreSQL async connection pool...")
+                _async_pool = await asyncpg.create_pool(
+                    host=db_settings.host,
+                    port=db_settings.port,
+                    user=db_settings.user,
+                    password=db_settings.password,
+                    database=db_settings.database,
+                    min_size=db_settings.pool_min_size,
+                    max_size=db_settings.pool_max_size,
+                    **pool_options(db_settings, db_settings.command_timeout),
+                )
+                logger.info("PostgreSQL async connection pool created successfully")
+            except Exception as e:
+                logger.error("Failed to create PostgreSQL async connection pool: %s", e)
+                raise
     
     return _async_pool
 
@@ -53,10 +85,14 @@ async def get_async_connection() -> asyncpg.Connection:
     """
     从异步连接池获取一个连接
     
+    需与 release_async_connection 成对调用；新代码优先使用连接池自带的
+    上下文管理器 ``async with (await get_async_pool()).acquire() as conn``，
+    退出时自动归还连接
+    
     Returns:
         asyncpg 连接实例
     """
-    pool = await get_async_pool()
+    pool = _async_pool or await get_async_pool()
     return await pool.acquire()
 
 
@@ -67,7 +103,7 @@ async def release_async_connection(conn: asyncpg.Connection):
     Args:
         conn: 要释放的连接
     """
-    pool = await get_async_pool()
+    pool = _async_pool or await get_async_pool()
     await pool.release(conn)
 
 
@@ -15,6 +15,12 @@
     await storage.download_file("tasks/task_id/output/file.pdb", local_path)
 """
 
-from peptide_opt.storage.seaweed import SeaweedStorage, get_storage, reset_storage
+from peptide_opt.storage.seaweed import (
+    SeaweedStorage,
+    gather_bounded,
+    get_storage,
+    reset_storage,
+    walk_files,
+)
 
-__all__ = ["SeaweedStorage", "get_storage", "reset_storage"]
+__all__ = ["SeaweedStorage", "gather_bounded", "get_storage", "reset_storage", "walk_files"]
@@ -3,9 +3,11 @@ SeaweedFS 存储实现
 支持 Filer API（主要）和 S3 API（备用）
 """
 
+import asyncio
 import logging
+import os
 from pathlib import Path
-from typing import List, AsyncIterator, Optional
+from typing import Awaitable, Iterable, List, AsyncIterator, Optional
 
 import aiohttp
 
@@ -13,6 +15,36 @@ from peptide_opt.config.settings import settings
 
 logger = logging.getLogger("seaweed_storage")
 
+# 批量操作时同时进行的请求数上限：每个请求各自打开连接和文件，不限制会一次占用大量 socket 与文件描述符
+MAX_CONCURRENT_TRANSFERS = 8
+
+
+async def gather_bounded(aws: Iterable[Awaitable], limit: int = MAX_CONCURRENT_TRANSFERS,
+                         return_exceptions: bool = False) -> list:
+    """与 asyncio.gather 相同（结果按传入顺序返回），但同时运行的请求不超过 limit 个"""
+    semaphore = asyncio.Semaphore(limit)
+    
+    async def run(aw):
+        async with semaphore:
+            return await aw
+    
+    return await asyncio.gather(*(run(aw) for aw in aws), return_exceptions=return_exceptions)
+
+
+def walk_files(root: Path) -> List[Path]:
+    """用 os.scandir 深度优先列出目录下的所有文件（目录项自带文件类型，无需逐个 stat）"""
+    files = []
+    pending = [root]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    files.append(Path(entry.path))
+    return files
+
+
 # 单例存储实例
 _storage_instance: Optional["SeaweedStorage"] = None
 
@@ -179,7 +211,7 @@ class SeaweedStorage:
     
     async def delete_files(self, remote_keys: List[str]) -> bool:
         """
-        批量删除 SeaweedFS 中的文件
+        批量删除 SeaweedFS 中的文件（各文件的删除请求有限并发）
         
         Args:
             remote_keys: 远程存储路径列表
@@ -187,8 +219,7 @@ class SeaweedStorage:
         Returns:
             是否删除成功
         """
-        for key in remote_keys:
-            await self.delete_file(key)
+        await gather_bounded(self.delete_file(key) for key in remote_keys)
         
         logger.info("Deleted %d files", len(remote_keys))
         return True
@@ -312,7 +343,7 @@ class SeaweedStorage:
     
     async def upload_directory(self, local_dir: Path, remote_prefix: str) -> List[str]:
         """
-        上传整个目录
+        上传整个目录（在线程中遍历目录，各文件的上传请求有限并发）
         
         Args:
             local_dir: 本地目录路径
@@ -322,13 +353,14 @@ class SeaweedStorage:
             上传的文件路径列表
         """
         local_dir = Path(local_dir)
-        uploaded = []
-        for file_path in local_dir.rglob('*'):
-            if file_path.is_file():
-                relative_path = file_path.relative_to(local_dir)
-                remote_key = f"{remote_prefix}/{relative_path}".replace('\\', '/')
-                await self.upload_file(file_path, remote_key)
-                uploaded.append(remote_key)
+        pairs = []
+        for file_path in await asyncio.to_thread(walk_files, local_dir):
+            relative_path = file_path.relative_to(local_dir)
+            remote_key = f"{remote_prefix}/{relative_path}".replace('\\', '/')
+            pairs.append((file_path, remote_key))
+        uploaded = await gather_bounded(
+            self.upload_file(file_path, remote_key) for file_path, remote_key in pairs
+        )
         
         logger.info("Uploaded directory %s -> %s (%d files)", 
                    local_dir, remote_prefix, len(uploaded))
@@ -336,7 +368,7 @@ class SeaweedStorage:
     
     async def download_directory(self, remote_prefix: str, local_dir: Path) -> List[Path]:
         """
-        下载整个目录
+        下载整个目录（列出文件后有限并发下载）
         
         Args:
             remote_prefix: 远程路径前缀
@@ -347,13 +379,11 @@ class SeaweedStorage:
         """
         local_dir = Path(local_dir)
         files = await self.list_files(remote_prefix)
-        downloaded = []
         
-        for remote_key in files:
-            relative_path = remote_key[len(remote_prefix):].lstrip('/')
-            local_path = local_dir / relative_path
-            await self.download_file(remote_key, local_path)
-            downloaded.append(local_path)
+        downloaded = await gather_bounded(
+            self.download_file(remote_key, local_dir / remote_key[len(remote_prefix):].lstrip('/'))
+            for remote_key in files
+        )
         
         logger.info("Downloaded directory %s -> %s (%d files)", 
                    remote_prefix, local_dir, len(downloaded))
@@ -6,33 +6,186 @@
 
 import asyncio
 import logging
+import math
+import multiprocessing
 import os
+import re
 import shutil
+import tempfile
+import threading
 import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
 import asyncpg
+import orjson
 
-from peptide_opt.core.optimizer import PeptideOptimizer
 from peptide_opt.core.validators import validate_fasta_file, validate_pdb_file
 from peptide_opt.config.settings import settings
-from peptide_opt.storage import get_storage
+from peptide_opt.db.postgres import pool_options
+from peptide_opt.storage import gather_bounded, get_storage, walk_files
 
 logger = logging.getLogger("async_task_processor")
 
+# 视为数据库不可用（而非 SQL 本身出错）的异常
+_DB_CONNECTION_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.InterfaceError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.CannotConnectNowError,
+)
+
+# 项目根目录（src/peptide_opt/tasks/processor.py 向上三级），在导入时解析一次，不依赖当前工作目录
+_PROJECT_ROOT = Path(__file__).resolve().parents[3]
+_DEFAULT_PROTEINMPNN_DIR = _PROJECT_ROOT / "vendor" / "ProteinMPNN"
+
+# 任务目录布局（本地临时目录与 SeaweedFS 存储前缀共用）
+CONFIG_NAME = "optimization_config.txt"
+INPUT_NAME = "input"
+OUTPUT_NAME = "output"
+FASTA_NAME = "peptide.fasta"
+DEFAULT_RECEPTOR_NAME = "5ffg.pdb"
+
+# optimization_config.txt 中的 key=value 行（忽略 # 注释行）
+_CONFIG_LINE_RE = re.compile(r'^[ \t]*([^#=\s][^=\n]*?)[ \t]*=[ \t]*(.*?)[ \t]*\r?$', re.M)
+
+
+def _parse_config_value(value: str) -> Any:
+    """把配置值转换为 bool/int/float，无法识别时保留字符串"""
+    lowered = value.lower()
+    if lowered in ('true', 'false'):
+        return lowered == 'true'
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    # nan/inf 之类的写法仍按字符串处理
+    return number if math.isfinite(number) else value
+
+
+def _to_bool(value: str) -> bool:
+    """解析布尔配置值"""
+    return value.lower() in ('true', '1', 'yes')
+
+
+# 已知配置项的类型转换，其余配置项按 bool/int/float/字符串通用解析
+_CONFIG_COERCERS = {
+    'cleanup': _to_bool,
+    'cores': int,
+    'n_poses': int,
+    'num_seq_per_target': int,
+    'proteinmpnn_seed': int,
+}
+
+
+def _coerce_config_value(key: str, value: str) -> Any:
+    """按配置项类型转换配置值，转换失败时退回通用解析"""
+    coerce = _CONFIG_COERCERS.get(key)
+    if coerce is not None:
+        try:
+            return coerce(value)
+        except ValueError:
+            pass
+    return _parse_config_value(value)
+
+
+def _parse_task_config(data: bytes) -> Dict[str, Any]:
+    """
+    解析任务配置文件内容
+    
+    支持 JSON 对象，以及 AstraMolecula 目前上传的 key=value 文本格式
+    
+    Raises:
+        ValueError: JSON 无效或内容不是 UTF-8 时
+    """
+    if data.lstrip().startswith(b'{'):
+        return orjson.loads(data)
+    text = data.decode('utf-8')
+    return {key: _coerce_config_value(key, value) for key, value in _CONFIG_LINE_RE.findall(text)}
+
+
+def _create_job_dirs(temp_base: Path, task_id: str) -> Tuple[Path, Path, Path]:
+    """
+    创建任务临时目录及其输入/输出子目录（目录名唯一，同一任务重新提交时不会与尚未清理的旧目录冲突）
+    
+    临时目录根只在首次获取时创建；运行期间被外部清理（如 tmp 清理任务）删除时在此重新创建
+    """
+    try:
+        job_dir = Path(tempfile.mkdtemp(prefix=f"{task_id}_", dir=temp_base))
+    except FileNotFoundError:
+        temp_base.mkdir(parents=True, exist_ok=True)
+        job_dir = Path(tempfile.mkdtemp(prefix=f"{task_id}_", dir=temp_base))
+    input_dir = job_dir / INPUT_NAME
+    input_dir.mkdir()
+    output_dir = job_dir / OUTPUT_NAME
+    output_dir.mkdir()
+    return job_dir, input_dir, output_dir
+
+
+# 工作进程中的进度队列，由进程池 initializer 设置
+_progress_queue = None
+
+
+def _init_pipeline_worker(progress_queue):
+    """进程池 initializer：保存主进程传入的进度队列"""
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def _report_pipeline_progress(task_id: str, progress: float, message: str):
+    """优化流程进度回调（在工作进程中执行），通过队列转发给主进程"""
+    if _progress_queue is None:
+        logger.info("Task %s progress: %.1f%% - %s", task_id, progress, message)
+        return
+    _progress_queue.put((task_id, progress, message))
+
+
+def _run_pipeline(optimizer_kwargs: Dict[str, Any]):
+    """
+    在工作进程中运行完整优化流程
+    
+    优化器内部只使用绝对路径，外部工具通过 cwd 参数指定运行目录，无需切换工作目录
+    """
+    # 优化器依赖较重（PyMOL/Biopython/pandas），只在工作进程中首次运行任务时导入
+    from peptide_opt.core.optimizer import PeptideOptimizer
+    
+    optimizer = PeptideOptimizer(**optimizer_kwargs)
+    optimizer.run_full_pipeline()
+
 
 class TaskProgressCallback:
-    """任务进度回调类"""
+    """
+    任务进度回调类
+    
+    进度只保存在内存中，调用本身不等待数据库；需要写库时交给处理器的状态写入队列批量提交。
+    数据库里的状态未变化时，最多每 DB_WRITE_INTERVAL 秒写一次
+    """
     
-    def __init__(self, task_id: str, connection, processor):
+    DB_WRITE_INTERVAL = 5.0
+    
+    def __init__(self, task_id: str, processor):
         self.task_id = task_id
-        self.connection = connection
         self.processor = processor
         self._is_completed = False
+        self._last_db_status = None
+        self._last_db_write_ts = 0.0
         
     async def update_progress(self, progress: float, info: str = None, step_name: str = None, step_progress: float = None):
         """更新任务进度"""
+        self.record_progress(progress, info, step_name, step_progress)
+    
+    def record_progress(self, progress: float, info: str = None, step_name: str = None, step_progress: float = None):
+        """更新任务进度（同步，需在事件循环线程中调用）"""
         if self._is_completed:
             logger.debug("Task %s already completed, skipping progress update", self.task_id)
             return
@@ -48,11 +201,15 @@ class TaskProgressCallback:
                 "last_updated": time.time()
             }
             
-            # 更新数据库中的任务状态
-            await self.connection.execute(
-                "UPDATE tasks SET status = $1 WHERE id = $2",
-                "processing", self.task_id
-            )
+            # 更新数据库中的任务状态（状态不变时节流）
+            # 数据库不可用时跳过写入，恢复后由处理器统一补写
+            now = time.monotonic()
+            if self.processor._db_healthy and (
+                    self._last_db_status != "processing"
+                    or now - self._last_db_write_ts > self.DB_WRITE_INTERVAL):
+                self.processor._queue_status(self.task_id, "processing")
+                self._last_db_status = "processing"
+                self._last_db_write_ts = now
                 
             logger.info("Task %s progress: %.1f%% - %s", 
                         self.task_id, progress, step_name or info or "")
@@ -70,26 +227,62 @@ class AsyncTaskProcessor:
     
     支持多容器 Worker 模式:
     - 使用数据库行级锁 (SELECT FOR UPDATE SKIP LOCKED) 防止任务重复处理
-    - 每个实例每次只处理一个任务 (max_workers=1)
+    - 每个实例同时处理的任务数由 task_processor.max_workers 控制（默认 1）
     - 支持 docker compose up --scale peptide-opt=N 水平扩展
     """
     
+    # 单次 executemany 合并的终态更新条数上限
+    STATUS_BATCH_SIZE = 64
+    # 每轮最多领取的任务数：限制单次领取语句的规模，积压任务分批领取，也给其他实例留出任务
+    MAX_CLAIM_PER_CYCLE = 4
+    # 内存中保留进度信息的已结束任务数上限
+    RETAINED_PROGRESS_LIMIT = 100
+    # 关闭时等待轮询循环自行退出的最长时间（秒）
+    SHUTDOWN_POLL_TIMEOUT = 5.0
+    # 数据库连接：建池重试次数、首次重试等待（秒，按 2 的幂递增）、建连/借用连接超时（秒）
+    DB_CONNECT_RETRIES = 3
+    DB_RETRY_BASE_DELAY = 0.1
+    DB_CONNECT_TIMEOUT = 2.0
+    # 终态写入失败后重试的最长等待（秒）
+    STATUS_RETRY_MAX_DELAY = 5.0
+    
     def __init__(self):
         task_settings = settings().task_processor
         db_settings = settings().database
         
         self.poll_interval = task_settings.poll_interval
+        self.notify_channel = task_settings.notify_channel
         self.active_tasks: Dict[str, asyncio.Task] = {}
         self.task_progress: Dict[str, Dict[str, Any]] = {}
+        # 已结束任务（按结束先后），用于限制 task_progress 的大小
+        self._retired_tasks: "OrderedDict[str, None]" = OrderedDict()
         self.is_running = True
         self.polling_task = None
         self._db_pool: Optional[asyncpg.Pool] = None
+        # 最近一次数据库访问是否成功；不可用期间跳过进度写入
+        self._db_healthy = True
+        # 专用于 LISTEN 的长连接，不占用连接池
+        self._listen_connection: Optional[asyncpg.Connection] = None
+        self._listen_failed = False
+        # 唤醒轮询循环的事件：有新任务或有空闲槽位时立即查询，poll_interval 仅作兜底
+        self._wake_event = asyncio.Event()
+        # 任务状态写入队列（进度对应的 processing 及 finished/failed/cancelled 终态），由 _write_task_statuses 批量提交
+        self._status_queue: asyncio.Queue = asyncio.Queue()
+        self._status_writer_task = None
         
-        # 每个容器实例每次只处理一个任务，便于水平扩展
+        # 默认每个容器实例每次只处理一个任务，便于水平扩展
         # 使用 docker compose up --scale peptide-opt=N 启动多个实例
-        from concurrent.futures import ThreadPoolExecutor
-        self.max_workers = 1  # 单任务模式
-        self.thread_executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        # 优化流程为 CPU 密集型，放到独立进程中执行；max_workers 同时限制并发任务数与进程池大小
+        self.max_workers = max(1, task_settings.max_workers)
+        # 进程池在第一个任务到来时才创建；使用 forkserver，工作进程不从已加载大量模块的主进程 fork
+        self._mp_context = multiprocessing.get_context('forkserver')
+        self._process_executor: Optional[ProcessPoolExecutor] = None
+        # 工作进程通过队列回报优化流程进度，由 _relay_pipeline_progress 写入对应任务的进度回调
+        self._progress_queue = self._mp_context.Queue()
+        self._progress_callbacks: Dict[str, TaskProgressCallback] = {}
+        self._progress_relay_thread: Optional[threading.Thread] = None
+        # 已定位的 ProteinMPNN 目录，首次找到后复用，避免每个任务重复探测多个候选路径
+        self._proteinmpnn_dir: Optional[str] = None
         
         # 数据库配置
         self.db_config = {
@@ -99,153 +292,349 @@ class AsyncTaskProcessor:
             'password': db_settings.password,
             'database': db_settings.database,
         }
+        # 连接池大小：至少为每个并发任务和轮询各保留一个连接
+        self.pool_min_size = db_settings.pool_min_size
+        self.pool_max_size = max(db_settings.pool_max_size, self.max_workers + 2)
         
         # 生成唯一的 worker ID 用于日志追踪
-        import uuid
         self.worker_id = str(uuid.uuid4())[:8]
         
         logger.info("AsyncTaskProcessor initialized (worker_id=%s, max_workers=%d)", 
                    self.worker_id, self.max_workers)
     
+    @property
+    def process_executor(self) -> ProcessPoolExecutor:
+        """运行优化流程的进程池（首次使用时创建）"""
+        if self._process_executor is None:
+            self._process_executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=self._mp_context,
+                initializer=_init_pipeline_worker,
+                initargs=(self._progress_queue,),
+            )
+        return self._process_executor
+    
+    @property
+    def db_pool(self) -> Optional[asyncpg.Pool]:
+        """任务处理器持有的数据库连接池（API 请求共用同一个连接池）"""
+        return self._db_pool
+    
     async def start_polling(self):
         """启动数据库轮询"""
         if self.polling_task is None:
             await self._init_db_pool()
+            await self._start_listener()
             logger.info("Starting database polling for peptide optimization tasks...")
             self.polling_task = asyncio.create_task(self._poll_database_tasks())
+            # 使用独立的守护线程阻塞读取进度队列：不占用默认线程池，进程退出时也不会因它而挂起
+            self._progress_relay_thread = threading.Thread(
+                target=self._relay_pipeline_progress,
+                args=(asyncio.get_running_loop(),),
+                name="pipeline-progress-relay",
+                daemon=True,
+            )
+            self._progress_relay_thread.start()
+    
+    def _queue_status(self, task_id: str, status: str):
+        """登记任务状态写入，必要时启动批量写入协程"""
+        self._status_queue.put_nowait((status, task_id))
+        if self._status_writer_task is None or self._status_writer_task.done():
+            self._status_writer_task = asyncio.create_task(self._write_task_statuses())
+    
+    async def _write_task_statuses(self):
+        """
+        把队列中积累的状态写入合并为 executemany
+        
+        同一批内先写 processing 再写终态；processing 不覆盖已写入的终态，任务结束前的进度写入晚到也不会回退状态。
+        数据库不可用导致写入失败时，终态留到下一批按退避间隔重试（关闭时只再尝试一次），processing 由恢复时统一补写
+        """
+        retry = []
+        failures = 0
+        while True:
+            if retry:
+                batch, retry = retry, []
+            else:
+                item = await self._status_queue.get()
+                if item is None:
+                    break
+                batch = [item]
+            stop = False
+            while len(batch) < self.STATUS_BATCH_SIZE and not self._status_queue.empty():
+                item = self._status_queue.get_nowait()
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            
+            processing = [entry for entry in batch if entry[0] == "processing"]
+            final = [entry for entry in batch if entry[0] != "processing"]
+            try:
+                async with self.get_db_connection() as connection:
+                    # 行已是目标状态或已结束时由数据库直接过滤，不产生实际写入
+                    if processing:
+                        await connection.executemany(
+                            "UPDATE tasks SET status = $1 WHERE id = $2 AND status <> $1 "
+                            "AND status NOT IN ('finished', 'failed', 'cancelled')",
+                            processing
+                        )
+                    if final:
+                        await connection.executemany(
+                            "UPDATE tasks SET status = $1, finished_at = NOW() WHERE id = $2 AND status <> $1",
+                            final
+                        )
+                failures = 0
+                logger.debug("Wrote %d task status update(s)", len(batch))
+            except _DB_CONNECTION_ERRORS as e:
+                if not final or stop:
+                    logger.error("Failed to update task status in database: %s (%s)", e, batch)
+                else:
+                    delay = min(self.DB_RETRY_BASE_DELAY * 2 ** failures, self.STATUS_RETRY_MAX_DELAY)
+                    failures += 1
+                    logger.warning("Failed to update task status in database, retrying %d final status(es) in %.1fs: %s",
+                                   len(final), delay, e)
+                    retry = final
+                    await asyncio.sleep(delay)
+            except Exception as e:
+                logger.error("Failed to update task status in database: %s (%s)", e, batch)
+            
+            if stop:
+                break
+    
+    def _relay_pipeline_progress(self, loop: asyncio.AbstractEventLoop):
+        """
+        在线程中阻塞读取工作进程回报的进度，通过 call_soon_threadsafe 交给事件循环处理
+        
+        读到哨兵值 None 或事件循环已关闭时退出
+        """
+        while True:
+            item = self._progress_queue.get()
+            if item is None:
+                break
+            try:
+                loop.call_soon_threadsafe(self._dispatch_pipeline_progress, *item)
+            except RuntimeError:
+                break
+    
+    def _dispatch_pipeline_progress(self, task_id: str, progress: float, message: str):
+        """把进度转交给对应任务的 TaskProgressCallback（事件循环线程中执行）"""
+        callback = self._progress_callbacks.get(task_id)
+        if callback is None:
+            logger.debug("Dropping progress for inactive task %s", task_id)
+            return
+        # 优化流程结束时会报告 100%，整理和上传结果仍属于任务的后续阶段
+        progress = min(progress, 89.0)
+        # 队列中晚到的消息不能让进度回退
+        current = self.task_progress.get(task_id)
+        if current is not None and progress < current["overall_progress"]:
+            logger.debug("Dropping stale progress %.1f%% for task %s", progress, task_id)
+            return
+        callback.record_progress(progress, message)
     
     async def _init_db_pool(self):
         """初始化数据库连接池"""
-        if self._db_pool is None:
+        if self._db_pool is not None:
+            return
+        for attempt in range(self.DB_CONNECT_RETRIES):
             try:
                 logger.info("Creating PostgreSQL connection pool...")
                 self._db_pool = await asyncpg.create_pool(
-                    host=self.db_config['host'],
-                    port=self.db_config['port'],
-                    user=self.db_config['user'],
-                    password=self.db_config['password'],
-                    database=self.db_config['database'],
-                    min_size=1,
-                    max_size=5,
+                    **self.db_config,
+                    min_size=self.pool_min_size,
+                    max_size=self.pool_max_size,
+                    timeout=self.DB_CONNECT_TIMEOUT,
+                    # 任务处理器的语句（领取任务、写状态）不套用 API 的语句超时
+                    **pool_options(settings().database),
                 )
                 logger.info("PostgreSQL connection pool created successfully")
+                self._set_db_healthy(True)
+                return
+            except _DB_CONNECTION_ERRORS as e:
+                self._set_db_healthy(False)
+                if attempt == self.DB_CONNECT_RETRIES - 1:
+                    logger.error("Failed to create database pool: %s", e)
+                    raise
+                delay = self.DB_RETRY_BASE_DELAY * 2 ** attempt
+                logger.warning("Failed to create database pool (attempt %d/%d), retrying in %.1fs: %s",
+                               attempt + 1, self.DB_CONNECT_RETRIES, delay, e)
+                await asyncio.sleep(delay)
+    
+    def _set_db_healthy(self, healthy: bool):
+        """
+        记录数据库可用状态
+        
+        从不可用恢复时，为仍在运行（尚未登记终态）的任务补写 processing 状态
+        """
+        if healthy and not self._db_healthy:
+            logger.info("Database connection recovered")
+            for task_id in self._progress_callbacks:
+                self._queue_status(task_id, "processing")
+        self._db_healthy = healthy
+    
+    async def _start_listener(self):
+        """
+        监听新任务通知 (PostgreSQL LISTEN/NOTIFY)
+        
+        收到通知后立即唤醒轮询循环；监听失败或连接断开时退回到按 poll_interval 轮询，
+        轮询循环每轮会尝试重新建立监听
+        """
+        if self._listen_connection is not None:
+            return
+        connection = None
+        try:
+            connection = await asyncpg.connect(**self.db_config, timeout=self.DB_CONNECT_TIMEOUT)
+            await connection.add_listener(self.notify_channel, self._on_task_notification)
+            connection.add_termination_listener(self._on_listener_terminated)
+            self._listen_connection = connection
+            self._listen_failed = False
+            logger.info("Listening for new tasks on channel '%s'", self.notify_channel)
+        except Exception as e:
+            # 只在首次失败时告警，避免每轮重试都刷日志
+            log = logger.debug if self._listen_failed else logger.warning
+            log("Failed to listen on channel '%s', falling back to polling: %s",
+                self.notify_channel, e)
+            self._listen_failed = True
+            if connection is not None:
+                connection.terminate()
+    
+    async def _stop_listener(self):
+        """关闭 LISTEN 连接"""
+        connection, self._listen_connection = self._listen_connection, None
+        if connection is not None:
+            try:
+                await connection.close()
             except Exception as e:
-                logger.error(f"Failed to create database pool: {e}")
-                raise
+                logger.debug("Error closing listen connection: %s", e)
+    
+    def _on_listener_terminated(self, connection):
+        """LISTEN 连接意外断开：丢弃连接并唤醒轮询循环，由其补查任务并重新监听"""
+        if self._listen_connection is connection:
+            logger.warning("Listen connection on channel '%s' lost, falling back to polling",
+                           self.notify_channel)
+            self._listen_connection = None
+            self.notify_new_task()
+    
+    def _on_task_notification(self, connection, pid, channel, payload):
+        """asyncpg 通知回调"""
+        logger.debug("[Worker %s] Received notification on '%s': %s", self.worker_id, channel, payload)
+        self.notify_new_task()
     
     async def _poll_database_tasks(self):
         """
         定时从数据库获取待处理的peptide优化任务
         
-        使用 SELECT FOR UPDATE SKIP LOCKED 实现行级锁:
+        使用 UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING 原子领取任务:
         - 防止多个 worker 同时获取同一个任务
         - SKIP LOCKED 确保如果任务被锁定，则跳过而不是等待
-        - 每个 worker 每次只获取一个任务 (单任务模式)
+        - 每次按空闲槽位数批量领取，一次往返完成锁定与状态更新
         """
         while self.is_running:
             try:
+                # 监听连接断开或未建立时重新监听
+                if self._listen_connection is None:
+                    await self._start_listener()
+                
                 # 如果已有任务在执行，则等待
                 if len(self.active_tasks) >= self.max_workers:
                     logger.debug("[Worker %s] Already processing %d task(s), waiting...", 
                                 self.worker_id, len(self.active_tasks))
-                    await asyncio.sleep(self.poll_interval)
+                    await self._wait_for_wakeup()
                     continue
                 
-                async with self._db_pool.acquire() as connection:
-                    # 使用事务和行级锁获取任务
-                    async with connection.transaction():
-                        # SELECT FOR UPDATE SKIP LOCKED:
-                        # - FOR UPDATE: 锁定选中的行
-                        # - SKIP LOCKED: 跳过已被其他 worker 锁定的行
-                        # - LIMIT 1: 每次只获取一个任务
-                        task = await connection.fetchrow(
-                            """
-                            SELECT id, job_dir 
+                free_slots = min(self.max_workers - len(self.active_tasks), self.MAX_CLAIM_PER_CYCLE)
+                async with self.get_db_connection() as connection:
+                    # 单条语句完成领取（语句本身即一个事务）：
+                    # - 子查询 FOR UPDATE SKIP LOCKED 锁定待处理行，跳过已被其他 worker 锁定的行
+                    # - LIMIT: 一次领取与空闲槽位数相同（不超过 MAX_CLAIM_PER_CYCLE）的任务，排除本实例已在执行的任务
+                    # - 子查询可走部分索引 idx_tasks_pending_peptide (created_at) WHERE status/task_type，
+                    #   见 docs/多用户并发任务处理的方案.md
+                    # - 外层 UPDATE 立即标记为 processing 并设置 started_at，RETURNING 返回领取结果
+                    tasks = await connection.fetch(
+                        """
+                        UPDATE tasks 
+                        SET status = 'processing', started_at = NOW() 
+                        WHERE id IN (
+                            SELECT id 
                             FROM tasks 
                             WHERE task_type = 'peptide_optimization' 
                               AND status = 'pending' 
+                              AND id <> ALL($2)
                             ORDER BY created_at ASC
-                            LIMIT 1
+                            LIMIT $1
                             FOR UPDATE SKIP LOCKED
-                            """
                         )
-                        
-                        if task:
-                            task_id, job_dir = task['id'], task['job_dir']
-                            
-                            if task_id not in self.active_tasks:
-                                # 立即将任务状态更新为 processing 并设置 started_at，防止其他 worker 获取
-                                await connection.execute(
-                                    "UPDATE tasks SET status = $1, started_at = NOW() WHERE id = $2",
-                                    "processing", task_id
-                                )
-                                
-                                logger.info("[Worker %s] Claimed task: %s", 
-                                           self.worker_id, task_id)
-                                
-                                # 提交任务到执行队列
-                                await self.submit_task(task_id, job_dir)
-                            else:
-                                logger.debug("[Worker %s] Task %s already in progress, skipping", 
-                                            self.worker_id, task_id)
-                        else:
-                            logger.debug("[Worker %s] No pending tasks available", self.worker_id)
-                        
+                        RETURNING id, job_dir, created_at
+                        """,
+                        free_slots, list(self.active_tasks)
+                    )
+                
+                # RETURNING 不保证顺序，按创建时间先后提交
+                claimed = [(task['id'], task['job_dir'])
+                           for task in sorted(tasks, key=lambda task: task['created_at'])]
+                if claimed:
+                    # 拼接任务 ID 列表只在 INFO 日志启用时进行
+                    if logger.isEnabledFor(logging.INFO):
+                        logger.info("[Worker %s] Claimed task(s): %s", 
+                                   self.worker_id, ", ".join(str(task_id) for task_id, _ in claimed))
+                else:
+                    logger.debug("[Worker %s] No pending tasks available", self.worker_id)
+                
+                # 领取语句提交、轮询连接归还后再提交任务；任务执行期间按需各自从连接池获取连接
+                for task_id, job_dir in claimed:
+                    await self.submit_task(task_id, job_dir)
+                # 仍有空闲槽位时立即继续领取，直到没有待处理任务
+                if claimed and len(self.active_tasks) < self.max_workers:
+                    continue
+                
             except Exception as e:
                 logger.error("[Worker %s] Error polling database for tasks: %s", 
                             self.worker_id, e)
             
-            await asyncio.sleep(self.poll_interval)
+            await self._wait_for_wakeup()
         
         logger.info("[Worker %s] Database polling stopped", self.worker_id)
     
-    async def get_db_connection(self):
-        """从连接池获取数据库连接"""
+    async def _wait_for_wakeup(self):
+        """等待唤醒事件，最多等待 poll_interval 秒"""
         try:
-            if self._db_pool is None:
-                await self._init_db_pool()
-            return await self._db_pool.acquire()
-        except Exception as e:
-            logger.error(f"数据库连接失败: {e}")
-            return None
+            await asyncio.wait_for(self._wake_event.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wake_event.clear()
     
-    async def release_db_connection(self, connection):
-        """释放数据库连接回连接池"""
-        if connection and self._db_pool:
-            await self._db_pool.release(connection)
+    def notify_new_task(self):
+        """通知轮询循环立即检查待处理任务（如新任务入库或任务槽位释放）"""
+        self._wake_event.set()
     
-    async def _read_task_config(self, job_dir: str) -> Dict[str, Any]:
-        """读取任务配置文件"""
-        config_path = os.path.join(job_dir, "optimization_config.txt")
-        config = {}
-        
-        if os.path.exists(config_path):
-            try:
-                with open(config_path, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        if '=' in line and not line.startswith('#'):
-                            key, value = line.split('=', 1)
-                            if value.lower() in ('true', 'false'):
-                                config[key] = value.lower() == 'true'
-                            elif value.isdigit():
-                                config[key] = int(value)
-                            elif value.replace('.', '').isdigit():
-                                config[key] = float(value)
-                            else:
-                                config[key] = value
-                logger.info("Loaded task config for job %s: %s", job_dir, config)
-            except Exception as e:
-                logger.error("Failed to read config file %s: %s", config_path, e)
-        else:
-            logger.warning("Config file not found at %s, using default values", config_path)
+    @asynccontextmanager
+    async def get_db_connection(self):
+        """
+        从连接池获取数据库连接
         
-        return config
+        用法: async with self.get_db_connection() as connection: ...
+        退出上下文时连接自动归还连接池。只有获取连接失败才把数据库标记为不可用，
+        调用方在上下文中自身抛出的异常（如文件 I/O 的 OSError）不影响数据库状态
+        """
+        if self._db_pool is None:
+            await self._init_db_pool()
+        try:
+            connection = await self._db_pool.acquire(timeout=self.DB_CONNECT_TIMEOUT)
+        except _DB_CONNECTION_ERRORS:
+            self._set_db_healthy(False)
+            raise
+        self._set_db_healthy(True)
+        try:
+            yield connection
+        finally:
+            await self._db_pool.release(connection)
     
     def _find_proteinmpnn_dir(self) -> str:
-        """查找 ProteinMPNN 目录"""
-        import os
-        
+        """查找 ProteinMPNN 目录（找到后缓存；未找到时不缓存默认路径，之后安装的目录仍能被发现）"""
+        if self._proteinmpnn_dir is None:
+            self._proteinmpnn_dir = self._locate_proteinmpnn_dir()
+        return self._proteinmpnn_dir or str(_DEFAULT_PROTEINMPNN_DIR)
+    
+    def _locate_proteinmpnn_dir(self) -> Optional[str]:
+        """在环境变量和候选路径中探测 ProteinMPNN 目录，未找到时返回 None"""
         # 首先检查环境变量
         env_path = os.environ.get('PROTEINMPNN_PATH')
         if env_path:
@@ -255,8 +644,8 @@ class AsyncTaskProcessor:
         
         search_paths = [
             Path("/app/vendor/ProteinMPNN"),  # Docker 容器路径
-            Path(__file__).parent.parent.parent.parent / "vendor" / "ProteinMPNN",
-            Path(__file__).parent.parent.parent.parent / "ProteinMPNN",
+            _DEFAULT_PROTEINMPNN_DIR,
+            _PROJECT_ROOT / "ProteinMPNN",
             Path.cwd() / "ProteinMPNN",
             Path.cwd() / "vendor" / "ProteinMPNN",
         ]
@@ -265,15 +654,11 @@ class AsyncTaskProcessor:
             if path.exists() and (path / "protein_mpnn_run.py").exists():
                 return str(path.resolve())
         
-        # 默认路径
-        return str(Path(__file__).parent.parent.parent.parent / "vendor" / "ProteinMPNN")
+        return None
     
     def _get_temp_dir(self) -> Path:
         """获取临时目录"""
-        storage_settings = settings().storage
-        temp_dir = Path(storage_settings.temp_dir)
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        return temp_dir
+        return settings().storage.get_temp_path()
     
     def _is_seaweedfs_path(self, job_dir: str) -> bool:
         """
@@ -312,154 +697,131 @@ class AsyncTaskProcessor:
         logger.warning("Cannot convert job_dir to storage prefix: %s", job_dir)
         return job_dir
     
-    async def _download_input_files(self, storage_prefix: str, temp_input_dir: Path) -> Dict[str, Any]:
+    async def _download_input_files(self, storage_prefix: str, temp_input_dir: Path) -> Tuple[Dict[str, Any], Path, Path]:
         """
         从 SeaweedFS 下载输入文件到临时目录
         
         Returns:
-            包含配置信息的字典
+            (配置信息字典, 本地 FASTA 文件路径, 本地 PDB 受体文件路径)
         """
         storage = get_storage()
         config = {}
         
         # 下载配置文件（如果存在）
         # 注意：AstraMolecula 上传配置文件到 {job_prefix}/optimization_config.txt（不在 input 子目录下）
-        config_key = f"{storage_prefix}/optimization_config.txt"
-        config_file = temp_input_dir / "optimization_config.txt"
+        # 配置文件只用于解析参数，直接读入内存，不经本地文件中转
+        config_key = f"{storage_prefix}/{CONFIG_NAME}"
         try:
-            await storage.download_file(config_key, config_file)
+            config_bytes = await storage.download_bytes(config_key)
             logger.info("Downloaded config file: %s", config_key)
-            # 解析配置文件
-            with open(config_file, 'r') as f:
-                for line in f:
-                    line = line.strip()
-                    if '=' in line and not line.startswith('#'):
-                        key, value = line.split('=', 1)
-                        if value.lower() in ('true', 'false'):
-                            config[key] = value.lower() == 'true'
-                        elif value.isdigit():
-                            config[key] = int(value)
-                        elif value.replace('.', '').isdigit():
-                            config[key] = float(value)
-                        else:
-                            config[key] = value
         except FileNotFoundError:
             logger.warning("Config file not found in storage: %s", config_key)
         except Exception as e:
             logger.error("Failed to download config file: %s", e)
+        else:
+            # 配置文件存在但无法解析时任务失败，不按默认参数运行
+            try:
+                config = _parse_task_config(config_bytes)
+            except ValueError as e:
+                raise ValueError(f"Invalid config file {config_key}: {e}") from e
         
-        # 下载 FASTA 文件
-        fasta_key = f"{storage_prefix}/input/peptide.fasta"
-        fasta_file = temp_input_dir / "peptide.fasta"
-        try:
-            await storage.download_file(fasta_key, fasta_file)
-            logger.info("Downloaded FASTA file: %s", fasta_key)
-        except Exception as e:
-            logger.error("Failed to download FASTA file: %s", e)
-            raise FileNotFoundError(f"FASTA file not found in storage: {fasta_key}")
-        
-        # 下载 PDB 受体文件
-        receptor_filename = config.get('receptor_pdb_filename', '5ffg.pdb')
-        pdb_key = f"{storage_prefix}/input/{receptor_filename}"
+        # FASTA 与 PDB 受体文件互不依赖，并发下载
+        fasta_key = f"{storage_prefix}/{INPUT_NAME}/{FASTA_NAME}"
+        fasta_file = temp_input_dir / FASTA_NAME
+        receptor_filename = config.get('receptor_pdb_filename', DEFAULT_RECEPTOR_NAME)
+        pdb_key = f"{storage_prefix}/{INPUT_NAME}/{receptor_filename}"
         pdb_file = temp_input_dir / receptor_filename
-        try:
-            await storage.download_file(pdb_key, pdb_file)
-            logger.info("Downloaded PDB file: %s", pdb_key)
-        except Exception as e:
-            logger.error("Failed to download PDB file: %s", e)
-            raise FileNotFoundError(f"PDB file not found in storage: {pdb_key}")
         
-        return config
+        async def download_input(key: str, local_path: Path, file_type: str):
+            try:
+                await storage.download_file(key, local_path)
+                logger.info("Downloaded %s file: %s", file_type, key)
+            except Exception as e:
+                logger.error("Failed to download %s file: %s", file_type, e)
+                raise FileNotFoundError(f"{file_type} file not found in storage: {key}")
+        
+        await asyncio.gather(
+            download_input(fasta_key, fasta_file, "FASTA"),
+            download_input(pdb_key, pdb_file, "PDB"),
+        )
+        
+        return config, fasta_file, pdb_file
     
     async def process_peptide_optimization_task(self, task_id: str, job_dir: str):
         """处理肽段优化任务（支持 SeaweedFS 存储）"""
-        connection = None
         temp_job_dir = None
         
         try:
-            connection = await self.get_db_connection()
-            if not connection:
-                raise Exception("Failed to connect to database")
-            
-            progress_callback = TaskProgressCallback(task_id, connection, self)
+            progress_callback = TaskProgressCallback(task_id, self)
+            self._progress_callbacks[task_id] = progress_callback
             await progress_callback.update_progress(0, "Starting peptide optimization")
             
-            original_cwd = os.getcwd()
-            
             try:
                 # 将 job_dir 转换为 SeaweedFS 存储前缀
                 storage_prefix = self._convert_to_storage_prefix(job_dir)
                 logger.info("Task %s: storage_prefix=%s (original job_dir=%s)", 
                            task_id, storage_prefix, job_dir)
                 
-                # 创建临时目录
-                temp_base = self._get_temp_dir()
-                temp_job_dir = temp_base / task_id
-                temp_job_dir.mkdir(parents=True, exist_ok=True)
-                temp_input_dir = temp_job_dir / "input"
-                temp_input_dir.mkdir(exist_ok=True)
-                temp_output_dir = temp_job_dir / "output"
-                temp_output_dir.mkdir(exist_ok=True)
+                # 创建临时目录（目录创建与清理都是阻塞的文件系统调用，放到线程中执行）
+                temp_job_dir, temp_input_dir, temp_output_dir = await asyncio.to_thread(
+                    _create_job_dirs, self._get_temp_dir(), task_id
+                )
                 
                 logger.info("Task %s: Created temp directory: %s", task_id, temp_job_dir)
                 
                 # 从 SeaweedFS 下载输入文件
                 await progress_callback.update_progress(5, "Downloading input files from storage")
-                config = await self._download_input_files(storage_prefix, temp_input_dir)
-                
-                # 切换到临时目录
-                os.chdir(temp_job_dir)
-                
-                fasta_file = str(temp_input_dir / "peptide.fasta")
-                receptor_filename = config.get('receptor_pdb_filename', '5ffg.pdb')
-                pdb_file = str(temp_input_dir / receptor_filename)
+                config, fasta_file, pdb_file = await self._download_input_files(
+                    storage_prefix, temp_input_dir
+                )
 
-                if not os.path.exists(fasta_file):
+                if not fasta_file.is_file():
                     raise FileNotFoundError(f"FASTA file not found: {fasta_file}")
-                if not os.path.exists(pdb_file):
+                if not pdb_file.is_file():
                     raise FileNotFoundError(f"PDB file not found: {pdb_file}")
 
                 await progress_callback.update_progress(10, "Validating input files")
-                validate_fasta_file(fasta_file)
-                validate_pdb_file(pdb_file)
+                # 校验涉及文件读取，放到线程中并发执行，避免阻塞事件循环
+                await asyncio.gather(
+                    asyncio.to_thread(validate_fasta_file, str(fasta_file)),
+                    asyncio.to_thread(validate_pdb_file, str(pdb_file)),
+                )
                 
                 await progress_callback.update_progress(20, "Reading task configuration")
                 
-                def sync_progress_callback(progress, message):
-                    logger.info(f"Task {task_id} progress: {progress:.1f}% - {message}")
-                
-                proteinmpnn_path = self._find_proteinmpnn_dir()
+                proteinmpnn_path = self._proteinmpnn_dir or await asyncio.to_thread(self._find_proteinmpnn_dir)
                 
                 # CPU 核心数始终由运行环境自动检测（80% CPU），忽略配置文件中的 cores 值
                 # 这确保 Docker 容器能根据实际分配的 CPU 资源自动调整
-                optimizer = PeptideOptimizer(
-                    input_dir=str(temp_input_dir),
-                    output_dir=str(temp_output_dir),
-                    proteinmpnn_dir=proteinmpnn_path,
-                    cores=None,  # 始终自动检测，忽略 config.get('cores')
-                    cleanup=config.get('cleanup', True),
-                    n_poses=config.get('n_poses', 10),
-                    num_seq_per_target=config.get('num_seq_per_target', 10),
-                    proteinmpnn_seed=config.get('proteinmpnn_seed', 37),
-                    progress_callback=sync_progress_callback,
-                    receptor_pdb_filename=config.get('receptor_pdb_filename')
-                )
+                # 参数需可 pickle，优化器在工作进程中构造
+                optimizer_kwargs = {
+                    'input_dir': str(temp_input_dir),
+                    'output_dir': str(temp_output_dir),
+                    'proteinmpnn_dir': proteinmpnn_path,
+                    'cores': None,  # 始终自动检测，忽略 config.get('cores')
+                    'cleanup': config.get('cleanup', True),
+                    'n_poses': config.get('n_poses', 10),
+                    'num_seq_per_target': config.get('num_seq_per_target', 10),
+                    'proteinmpnn_seed': config.get('proteinmpnn_seed', 37),
+                    'progress_callback': partial(_report_pipeline_progress, task_id),
+                    'receptor_pdb_filename': config.get('receptor_pdb_filename')
+                }
                 
                 await progress_callback.update_progress(30, "Running peptide optimization")
-                await asyncio.get_event_loop().run_in_executor(
-                    self.thread_executor, 
-                    optimizer.run_full_pipeline
+                # 整个优化流程在进程池中执行，事件循环在此期间继续响应 API 请求和轮询
+                await asyncio.get_running_loop().run_in_executor(
+                    self.process_executor,
+                    _run_pipeline,
+                    optimizer_kwargs
                 )
                 
                 await progress_callback.update_progress(90, "Finalizing results")
                 await progress_callback.update_progress(92, "Uploading results to storage")
                 await self._upload_results_to_storage(task_id, str(temp_job_dir), storage_prefix)
                 
-                await connection.execute(
-                    "UPDATE tasks SET status = $1, finished_at = NOW() WHERE id = $2",
-                    "finished", task_id
-                )
-                
+                self._queue_status(task_id, "finished")
+                # 终态已登记：不再转发进度，数据库恢复时也不再为该任务补写 processing
+                self._progress_callbacks.pop(task_id, None)
                 progress_callback.mark_completed()
                 logger.info("Task %s completed successfully", task_id)
                 
@@ -473,18 +835,16 @@ class AsyncTaskProcessor:
                 }
                 
             finally:
-                os.chdir(original_cwd)
-                
                 # 清理临时目录
-                if temp_job_dir and temp_job_dir.exists():
+                if temp_job_dir:
                     try:
-                        shutil.rmtree(temp_job_dir, ignore_errors=True)
+                        await asyncio.to_thread(shutil.rmtree, temp_job_dir, ignore_errors=True)
                         logger.info("Task %s: Cleaned up temp directory: %s", task_id, temp_job_dir)
                     except Exception as e:
                         logger.warning("Task %s: Failed to cleanup temp directory: %s", task_id, e)
                 
         except Exception as e:
-            logger.error("Task %s failed: %s", task_id, str(e))
+            logger.error("Task %s failed: %s", task_id, e)
             
             self.task_progress[task_id] = {
                 "overall_progress": 0,
@@ -495,21 +855,24 @@ class AsyncTaskProcessor:
                 "last_updated": time.time()
             }
             
-            if connection:
-                try:
-                    await connection.execute(
-                        "UPDATE tasks SET status = $1, finished_at = NOW() WHERE id = $2",
-                        "failed", task_id
-                    )
-                except Exception as db_error:
-                    logger.error("Failed to update task status in database: %s", db_error)
+            self._queue_status(task_id, "failed")
         
         finally:
-            if connection:
-                await self.release_db_connection(connection)
-            
-            if task_id in self.active_tasks:
-                del self.active_tasks[task_id]
+            self._progress_callbacks.pop(task_id, None)
+            self._retire_task_progress(task_id)
+    
+    def _retire_task_progress(self, task_id: str):
+        """
+        任务结束后只保留最近 RETAINED_PROGRESS_LIMIT 个已结束任务的进度
+        
+        任务状态以数据库为准，内存中的进度仅供查询最近任务，超出上限时丢弃最早结束的任务
+        """
+        self._retired_tasks[task_id] = None
+        self._retired_tasks.move_to_end(task_id)
+        while len(self._retired_tasks) > self.RETAINED_PROGRESS_LIMIT:
+            retired_id, _ = self._retired_tasks.popitem(last=False)
+            if retired_id not in self.active_tasks:
+                self.task_progress.pop(retired_id, None)
     
     async def submit_task(self, task_id: str, job_dir: str) -> bool:
         """提交新任务"""
@@ -523,9 +886,12 @@ class AsyncTaskProcessor:
         
         try:
             task = asyncio.create_task(
-                self.process_peptide_optimization_task(task_id, job_dir)
+                self.process_peptide_optimization_task(task_id, job_dir),
+                name=f"peptide-opt-{task_id}"
             )
             self.active_tasks[task_id] = task
+            # 任务以任何方式结束（完成、异常、取消）都会从 active_tasks 中移除
+            task.add_done_callback(partial(self._on_task_done, task_id))
             
             logger.info("Task %s submitted successfully", task_id)
             return True
@@ -534,14 +900,20 @@ class AsyncTaskProcessor:
             logger.error("Failed to submit task %s: %s", task_id, e)
             return False
     
+    def _on_task_done(self, task_id: str, task: asyncio.Task):
+        """任务结束回调：移除活动任务并唤醒轮询循环领取下一个任务"""
+        if self.active_tasks.get(task_id) is task:
+            del self.active_tasks[task_id]
+        self.notify_new_task()
+    
     async def cancel_task(self, task_id: str) -> bool:
         """取消任务"""
-        if task_id not in self.active_tasks:
+        task = self.active_tasks.get(task_id)
+        if task is None:
             logger.warning("Task %s not found in active tasks", task_id)
             return False
         
         try:
-            task = self.active_tasks[task_id]
             task.cancel()
             
             try:
@@ -549,17 +921,8 @@ class AsyncTaskProcessor:
             except asyncio.CancelledError:
                 pass
             
-            connection = await self.get_db_connection()
-            if connection:
-                try:
-                    await connection.execute(
-                        "UPDATE tasks SET status = $1, finished_at = NOW() WHERE id = $2",
-                        "cancelled", task_id
-                    )
-                finally:
-                    await self.release_db_connection(connection)
+            self._queue_status(task_id, "cancelled")
             
-            del self.active_tasks[task_id]
             logger.info("Task %s cancelled successfully", task_id)
             return True
             
@@ -576,12 +939,13 @@ class AsyncTaskProcessor:
         return len(self.active_tasks)
     
     def get_task_progress(self, task_id: str) -> Optional[Dict[str, Any]]:
-        """获取特定任务的进度信息"""
-        return self.task_progress.get(task_id)
+        """获取特定任务的进度信息（副本）"""
+        progress = self.task_progress.get(task_id)
+        return dict(progress) if progress is not None else None
     
     def get_all_tasks_progress(self) -> Dict[str, Dict[str, Any]]:
-        """获取所有任务的进度信息"""
-        return self.task_progress.copy()
+        """获取所有任务的进度信息快照（副本，调用方可在 await 之间安全遍历和修改）"""
+        return {task_id: dict(progress) for task_id, progress in list(self.task_progress.items())}
     
     async def shutdown(self):
         """关闭任务处理器"""
@@ -590,28 +954,46 @@ class AsyncTaskProcessor:
         
         if self.polling_task:
             logger.info("Stopping database polling...")
-            self.polling_task.cancel()
+            # 唤醒等待中的轮询循环，使其检查 is_running 后自行退出；正在执行的查询超时后才取消
+            self.notify_new_task()
             try:
-                await self.polling_task
-            except asyncio.CancelledError:
+                await asyncio.wait_for(self.polling_task, timeout=self.SHUTDOWN_POLL_TIMEOUT)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
                 pass
         
-        for task_id, task in self.active_tasks.items():
+        # 取快照：任务结束时的回调会修改 active_tasks
+        active = list(self.active_tasks.items())
+        for task_id, task in active:
             logger.info("Cancelling task: %s", task_id)
             task.cancel()
         
-        if self.active_tasks:
-            await asyncio.gather(*self.active_tasks.values(), return_exceptions=True)
+        if active:
+            await asyncio.gather(*(task for _, task in active), return_exceptions=True)
+        
+        # 停止进度转发：哨兵值让阻塞在 queue.get 的线程返回
+        if self._progress_relay_thread is not None:
+            self._progress_queue.put(None)
+            await asyncio.to_thread(self._progress_relay_thread.join, self.SHUTDOWN_POLL_TIMEOUT)
+            self._progress_relay_thread = None
+        
+        await self._stop_listener()
+        
+        # 先写完排队中的任务状态，再关闭连接池
+        if self._status_writer_task and not self._status_writer_task.done():
+            self._status_queue.put_nowait(None)
+            await self._status_writer_task
+        self._status_writer_task = None
         
         if self._db_pool:
             logger.info("Closing database connection pool...")
             await self._db_pool.close()
             self._db_pool = None
         
-        # 关闭线程池
-        if self.thread_executor:
-            logger.info("Shutting down thread executor...")
-            self.thread_executor.shutdown(wait=False)
+        # 关闭进程池（仅在实际创建过时）
+        if self._process_executor is not None:
+            logger.info("Shutting down process executor...")
+            self._process_executor.shutdown(wait=False, cancel_futures=True)
+            self._process_executor = None
         
         logger.info("AsyncTaskProcessor shutdown complete")
     
@@ -626,28 +1008,34 @@ class AsyncTaskProcessor:
         """
         try:
             storage = get_storage()
-            output_dir = Path(job_dir) / "output"
+            output_dir = Path(job_dir) / OUTPUT_NAME
             
-            if not output_dir.exists():
+            if not await asyncio.to_thread(output_dir.is_dir):
                 logger.warning("Output directory not found: %s", output_dir)
                 return
             
+            uploads = []
+            for file_path in await asyncio.to_thread(walk_files, output_dir):
+                relative_path = file_path.relative_to(output_dir)
+                
+                # 使用存储前缀或默认路径
+                if storage_prefix:
+                    remote_key = f"{storage_prefix}/{OUTPUT_NAME}/{relative_path}"
+                else:
+                    remote_key = f"tasks/{task_id}/peptide/{OUTPUT_NAME}/{relative_path}"
+                uploads.append((file_path, remote_key))
+            
+            # 各结果文件有限并发上传，单个文件失败不影响其余文件
+            results = await gather_bounded(
+                (storage.upload_file(file_path, remote_key) for file_path, remote_key in uploads),
+                return_exceptions=True,
+            )
             uploaded_count = 0
-            for file_path in output_dir.rglob("*"):
-                if file_path.is_file():
-                    relative_path = file_path.relative_to(output_dir)
-                    
-                    # 使用存储前缀或默认路径
-                    if storage_prefix:
-                        remote_key = f"{storage_prefix}/output/{relative_path}"
-                    else:
-                        remote_key = f"tasks/{task_id}/peptide/output/{relative_path}"
-                    
-                    try:
-                        await storage.upload_file(file_path, remote_key)
-                        uploaded_count += 1
-                    except Exception as e:
-                        logger.error("Failed to upload file %s: %s", file_path, e)
+            for (file_path, _), result in zip(uploads, results, strict=True):
+                if isinstance(result, BaseException):
+                    logger.error("Failed to upload file %s: %s", file_path, result)
+                else:
+                    uploaded_count += 1
             
             logger.info("Uploaded %d files to SeaweedFS for task %s", uploaded_count, task_id)
             
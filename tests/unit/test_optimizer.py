@@ -0,0 +1,139 @@
+"""
+优化器辅助函数单元测试
+
+与原先基于 Biopython 的实现（StructureBuilder + PDBIO 合并结构、ProteinAnalysis 计算性质）对比
+"""
+
+import pytest
+from Bio.PDB import PDBIO, PDBParser, StructureBuilder
+from Bio.PDB.Atom import Atom
+from Bio.PDB.Chain import Chain
+from Bio.PDB.Residue import Residue
+from Bio.SeqUtils.ProtParam import ProteinAnalysis
+
+from peptide_opt.core.optimizer import (
+    HOPP_WOODS,
+    _PROTEIN_CHAIN_IDS,
+    _hydrophilicity,
+    _remap_chain_lines,
+    _sequence_properties,
+    _write_merged_pdb,
+)
+
+
+PEPTIDE_PDB = """\
+ATOM      1  N   GLY X   1      10.000  11.000  12.000  1.00 20.00           N
+ATOM      2  CA  GLY X   1      11.458  11.000  12.000  1.00 20.00           C
+ATOM      3  N   ALA X   2      12.009  12.420  12.000  1.00 20.00           N
+ATOM      4  CB  ALA X   2      13.246  13.390  12.000  0.50 25.00           C
+TER       5      ALA X   2
+END
+"""
+
+RECEPTOR_PDB = """\
+HEADER    RECEPTOR
+ATOM      1  N   MET A   1       0.000   0.000   0.000  1.00  0.00           N
+ATOM      2  CA  MET A   1       1.458   0.000   0.000  1.00  0.00           C
+ATOM      3  H   MET A   1      -0.500   0.800   0.100  1.00  0.00           H
+TER       4      MET A   1
+ATOM      5  N   LYS C  10       5.000   5.000   5.000  1.00 10.00           N
+ATOM      6  CA  LYS C  10       6.458   5.000   5.000  1.00 10.00           C
+TER       7      LYS C  10
+END
+"""
+
+SEQUENCES = ["ACDEFGHIKLMNPQRSTVWY", "GLWSKIKEVGKEAAKAAAKAAGKAALGAVSEAV", "WWYF", "K"]
+
+
+def _clone_and_rename_chain(original_chain, new_id):
+    """原实现：克隆链并重命名"""
+    new_chain = Chain(new_id)
+    for residue in original_chain:
+        new_residue = Residue(residue.id, residue.resname, residue.segid)
+        for atom in residue:
+            new_residue.add(Atom(
+                atom.name, atom.coord, atom.bfactor, atom.occupancy, atom.altloc,
+                atom.fullname.strip().ljust(4), atom.serial_number, element=atom.element,
+            ))
+        new_chain.add(new_residue)
+    return new_chain
+
+
+def _merge_with_biopython(peptide_pdb, protein_pdb, output_pdb):
+    """原实现：肽段链为 'A'，受体链依次为 B, C, D..."""
+    parser = PDBParser(QUIET=True)
+    peptide_structure = parser.get_structure("peptide", str(peptide_pdb))
+    protein_structure = parser.get_structure("protein", str(protein_pdb))
+    
+    builder = StructureBuilder.StructureBuilder()
+    builder.init_structure("combined")
+    builder.init_model(0)
+    builder.structure[0].add(_clone_and_rename_chain(list(peptide_structure.get_chains())[0], "A"))
+    for chain_id, chain in zip(_PROTEIN_CHAIN_IDS, protein_structure.get_chains(), strict=False):
+        builder.structure[0].add(_clone_and_rename_chain(chain, chain_id))
+    
+    io = PDBIO()
+    io.set_structure(builder.structure)
+    io.save(str(output_pdb))
+
+
+class TestMergeStructures:
+    """测试文本层面的结构合并"""
+    
+    def test_matches_biopython_merge(self, tmp_path):
+        """测试合并结果与原 Biopython 实现逐行一致（忽略行尾空白）"""
+        peptide_pdb = tmp_path / "peptide.pdb"
+        protein_pdb = tmp_path / "receptor.pdb"
+        peptide_pdb.write_text(PEPTIDE_PDB)
+        protein_pdb.write_text(RECEPTOR_PDB)
+        
+        expected = tmp_path / "expected.pdb"
+        _merge_with_biopython(peptide_pdb, protein_pdb, expected)
+        
+        merged = tmp_path / "complex.pdb"
+        _write_merged_pdb(merged, (
+            _remap_chain_lines(peptide_pdb, 'A'),
+            _remap_chain_lines(protein_pdb, _PROTEIN_CHAIN_IDS),
+        ))
+        
+        assert ([line.rstrip() for line in merged.read_text().splitlines()]
+                == [line.rstrip() for line in expected.read_text().splitlines()])
+    
+    def test_too_many_chains(self, tmp_path):
+        """测试链数超过可用链 ID 时报错"""
+        protein_pdb = tmp_path / "receptor.pdb"
+        protein_pdb.write_text(RECEPTOR_PDB)
+        
+        with pytest.raises(ValueError):
+            _remap_chain_lines(protein_pdb, 'B')
+
+
+class TestSequenceProperties:
+    """测试查找表计算的序列性质"""
+    
+    @pytest.mark.parametrize("seq", SEQUENCES)
+    def test_matches_protein_analysis(self, seq):
+        """测试与 ProteinAnalysis 的计算结果一致"""
+        analysis = ProteinAnalysis(seq)
+        mw, ip, aro, ins, gra, hyd, sec = _sequence_properties(seq)
+        
+        assert mw == pytest.approx(analysis.molecular_weight())
+        assert ip == pytest.approx(analysis.isoelectric_point())
+        assert aro == pytest.approx(analysis.aromaticity())
+        assert ins == pytest.approx(analysis.instability_index())
+        assert gra == pytest.approx(analysis.gravy())
+        assert sec == pytest.approx(analysis.secondary_structure_fraction())
+    
+    @pytest.mark.parametrize("seq", SEQUENCES + ["AXB", ""])
+    def test_hydrophilicity_matches_mean(self, seq):
+        """测试亲水性与逐残基取平均的原实现一致（未知残基按 0 计）"""
+        values = [HOPP_WOODS.get(aa, 0.0) for aa in seq]
+        expected = sum(values) / len(values) if values else 0.0
+        
+        assert _hydrophilicity(seq) == pytest.approx(expected)
+        assert _hydrophilicity(seq, HOPP_WOODS) == pytest.approx(expected)
+    
+    def test_non_standard_residue(self):
+        """测试非标准氨基酸报错"""
+        with pytest.raises(ValueError):
+            _sequence_properties("ACDXZ")
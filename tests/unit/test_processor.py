@@ -0,0 +1,192 @@
+"""
+任务处理器单元测试
+
+配置文件解析及任务状态批量写入
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from peptide_opt.tasks.processor import (
+    AsyncTaskProcessor,
+    TaskProgressCallback,
+    _create_job_dirs,
+    _parse_task_config,
+)
+
+
+class TestParseTaskConfig:
+    """测试任务配置文件解析"""
+    
+    def test_json(self):
+        """测试 JSON 对象格式"""
+        data = b'{"n_poses": 5, "cleanup": false, "receptor_pdb_filename": "r.pdb"}'
+        assert _parse_task_config(data) == {
+            "n_poses": 5, "cleanup": False, "receptor_pdb_filename": "r.pdb",
+        }
+    
+    def test_key_value(self):
+        """测试 key=value 文本格式（忽略注释和空行，去除两侧空白）"""
+        data = (
+            b"# optimization config\n"
+            b"\n"
+            b"n_poses = 5\r\n"
+            b"  receptor_pdb_filename=receptor.pdb  \n"
+            b"note = a=b\n"
+        )
+        assert _parse_task_config(data) == {
+            "n_poses": 5, "receptor_pdb_filename": "receptor.pdb", "note": "a=b",
+        }
+    
+    @pytest.mark.parametrize("value,expected", [
+        ("-3", -3),
+        ("-0.25", -0.25),
+        ("1e-3", 1e-3),
+        ("-2.5E+2", -250.0),
+        ("nan", "nan"),
+        ("inf", "inf"),
+        ("v1.0", "v1.0"),
+    ])
+    def test_numbers(self, value, expected):
+        """测试负数与科学计数法数值，非有限值和非数值保留字符串"""
+        config = _parse_task_config(f"threshold={value}\n".encode())
+        assert config["threshold"] == expected
+        assert type(config["threshold"]) is type(expected)
+    
+    @pytest.mark.parametrize("text,expected", [
+        ("cleanup=True", {"cleanup": True}),
+        ("cleanup=false", {"cleanup": False}),
+        ("cleanup=yes", {"cleanup": True}),
+        ("cleanup=0", {"cleanup": False}),
+        ("verbose=TRUE", {"verbose": True}),
+        ("verbose=no", {"verbose": "no"}),
+    ])
+    def test_bools(self, text, expected):
+        """测试布尔值：已知配置项接受 yes/1 等写法，其余配置项只识别 true/false"""
+        assert _parse_task_config(text.encode()) == expected
+    
+    @pytest.mark.parametrize("data", [b'{"n_poses": 5', b"n_poses=\xff"])
+    def test_invalid(self, data):
+        """测试无效 JSON 与非 UTF-8 内容抛出 ValueError"""
+        with pytest.raises(ValueError):
+            _parse_task_config(data)
+    
+    def test_known_int_falls_back(self):
+        """测试已知整数配置项无法转换时退回通用解析"""
+        assert _parse_task_config(b"n_poses=2.5") == {"n_poses": 2.5}
+
+
+class FakeConnection:
+    """记录 executemany 调用的假连接"""
+    
+    def __init__(self, fail_times=0):
+        self.calls = []
+        self.fail_times = fail_times
+    
+    async def executemany(self, query, args):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionResetError("connection lost")
+        self.calls.append((query, list(args)))
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    """使用假连接的任务处理器"""
+    processor = AsyncTaskProcessor()
+    processor.connection = FakeConnection()
+    processor.DB_RETRY_BASE_DELAY = 0
+    
+    @asynccontextmanager
+    async def get_db_connection():
+        yield processor.connection
+    
+    monkeypatch.setattr(processor, "get_db_connection", get_db_connection)
+    return processor
+
+
+async def _drain(processor):
+    """发送哨兵值并等待写入协程退出"""
+    processor._status_queue.put_nowait(None)
+    await asyncio.wait_for(processor._status_writer_task, timeout=5)
+
+
+class TestWriteTaskStatuses:
+    """测试任务状态批量写入"""
+    
+    async def test_processing_before_final(self, processor):
+        """测试同一批内先写 processing 再写终态，且 processing 不覆盖终态"""
+        processor._queue_status("t1", "processing")
+        processor._queue_status("t2", "processing")
+        processor._queue_status("t1", "finished")
+        processor._queue_status("t3", "failed")
+        await _drain(processor)
+        
+        (processing_query, processing), (final_query, final) = processor.connection.calls
+        assert processing == [("processing", "t1"), ("processing", "t2")]
+        assert "NOT IN ('finished', 'failed', 'cancelled')" in processing_query
+        assert final == [("finished", "t1"), ("failed", "t3")]
+        assert "finished_at" in final_query
+    
+    async def test_batch_size(self, processor):
+        """测试每批最多 STATUS_BATCH_SIZE 条"""
+        processor.STATUS_BATCH_SIZE = 2
+        for i in range(5):
+            processor._queue_status(f"t{i}", "finished")
+        await _drain(processor)
+        
+        assert [len(args) for _, args in processor.connection.calls] == [2, 2, 1]
+    
+    async def test_final_retried_after_failure(self, processor):
+        """测试数据库不可用时终态被重试，processing 被丢弃"""
+        processor.connection.fail_times = 1
+        processor._queue_status("t1", "processing")
+        processor._queue_status("t1", "finished")
+        await asyncio.sleep(0)
+        await _drain(processor)
+        
+        assert [args for _, args in processor.connection.calls] == [[("finished", "t1")]]
+    
+    async def test_recovery_requeues_running_tasks(self, processor):
+        """测试数据库恢复时为仍在运行的任务补写 processing"""
+        processor._progress_callbacks = {"t1": object()}
+        processor._db_healthy = False
+        processor._set_db_healthy(True)
+        await _drain(processor)
+        
+        assert [args for _, args in processor.connection.calls] == [[("processing", "t1")]]
+
+
+class TestDispatchPipelineProgress:
+    """测试工作进程进度的转发"""
+    
+    async def test_progress_never_moves_backwards(self, processor):
+        """测试晚到的较低进度被忽略，且不超过 89%"""
+        processor._progress_callbacks["t1"] = TaskProgressCallback("t1", processor)
+        processor._dispatch_pipeline_progress("t1", 55, "Step 3")
+        processor._dispatch_pipeline_progress("t1", 45, "Step 2")
+        assert processor.task_progress["t1"]["overall_progress"] == 55
+        
+        processor._dispatch_pipeline_progress("t1", 100, "Done")
+        assert processor.task_progress["t1"]["overall_progress"] == 89.0
+        await _drain(processor)
+    
+    def test_inactive_task_dropped(self, processor):
+        """测试已结束任务的进度被丢弃"""
+        processor._dispatch_pipeline_progress("t1", 55, "Step 3")
+        assert "t1" not in processor.task_progress
+
+
+class TestCreateJobDirs:
+    """测试任务临时目录创建"""
+    
+    def test_recreates_missing_temp_base(self, tmp_path):
+        """测试临时目录根被删除后重新创建"""
+        temp_base = tmp_path / "peptide_opt"
+        job_dir, input_dir, output_dir = _create_job_dirs(temp_base, "t1")
+        
+        assert job_dir.parent == temp_base
+        assert job_dir.name.startswith("t1_")
+        assert input_dir.is_dir() and output_dir.is_dir()
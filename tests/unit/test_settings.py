@@ -0,0 +1,104 @@
+"""
+配置加载单元测试
+
+扁平化查找及专用环境变量覆盖与原先逐层查找 / os.getenv 回退的实现对比
+"""
+
+import pytest
+
+from peptide_opt.config import settings as settings_module
+from peptide_opt.config.settings import DatabaseSettings, TaskProcessorSettings, get
+
+
+SAMPLE_CONFIG = {
+    "server": {"host": "0.0.0.0", "port": 8001},
+    "database": {
+        "host": "db.internal",
+        "port": 5432,
+        "user": "admin",
+        "password": "secret",
+        "database": "peptide",
+        "pool": {"min_size": 2, "max_size": 8},
+    },
+    "storage": {"temp_dir": "/tmp/peptide_opt", "presigned_url_expires": 3600},
+    "task_processor": {"poll_interval": 30, "max_workers": 1},
+}
+
+LOOKUPS = [
+    ("database", "host"),
+    ("database", "port"),
+    ("database", "pool.min_size"),
+    ("database", "pool.max_size"),
+    ("database", "pool"),
+    ("database", "pool.missing"),
+    ("database", "missing"),
+    ("database", "host.nested"),
+    ("storage", "temp_dir"),
+    ("missing", "key"),
+    ("missing", "pool.min_size"),
+]
+
+
+def _nested_get(config, section, key, default=None):
+    """原实现：逐层查找嵌套键"""
+    section_data = config.get(section, {})
+    if '.' in key:
+        result = section_data
+        for k in key.split('.'):
+            if isinstance(result, dict):
+                result = result.get(k)
+            else:
+                return default
+        return result if result is not None else default
+    return section_data.get(key, default)
+
+
+@pytest.fixture
+def sample_settings(monkeypatch):
+    """用示例配置替换已加载的配置，并清空扁平化缓存"""
+    for env_key, _, _ in settings_module._ENV_OVERLAY:
+        monkeypatch.delenv(env_key, raising=False)
+    monkeypatch.setattr(settings_module, "_settings_cache", SAMPLE_CONFIG)
+    monkeypatch.setattr(settings_module, "_flat_cache", None)
+    return SAMPLE_CONFIG
+
+
+class TestGet:
+    """测试扁平化配置查找"""
+    
+    @pytest.mark.parametrize("section,key", LOOKUPS)
+    def test_matches_nested_lookup(self, sample_settings, section, key):
+        """测试查找结果与逐层查找一致"""
+        expected = _nested_get(sample_settings, section, key, "default")
+        assert get(section, key, "default") == expected
+    
+    def test_whole_section(self, sample_settings):
+        """测试不带键时返回整个配置节"""
+        assert get("database") is sample_settings["database"]
+        assert get("missing", default={}) == {}
+
+
+class TestEnvOverlay:
+    """测试专用环境变量覆盖"""
+    
+    def test_overlay_matches_getenv(self, sample_settings, monkeypatch):
+        """测试设置的环境变量优先于配置文件，未设置的保持配置文件中的值"""
+        monkeypatch.setenv("DB_HOST", "10.0.0.5")
+        monkeypatch.setenv("DB_PORT", "6543")
+        monkeypatch.setenv("MAX_CONCURRENT_TASKS", "3")
+        
+        db = DatabaseSettings.from_config()
+        assert db.host == "10.0.0.5"
+        assert db.port == 6543
+        assert db.user == sample_settings["database"]["user"]
+        assert db.pool_min_size == 2
+        assert db.pool_max_size == 8
+        
+        assert TaskProcessorSettings.from_config().max_workers == 3
+    
+    def test_without_overlay(self, sample_settings):
+        """测试未设置环境变量时使用配置文件中的值"""
+        db = DatabaseSettings.from_config()
+        assert db.host == "db.internal"
+        assert db.port == 5432
+        assert TaskProcessorSettings.from_config().poll_interval == 30
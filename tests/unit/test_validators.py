@@ -5,6 +5,7 @@
 import pytest
 from peptide_opt.core.validators import (
     ValidationError,
+    validate_fasta_bytes,
     validate_fasta_file,
     validate_pdb_file,
     validate_sequence,
@@ -63,6 +64,14 @@ class TestValidateFastaFile:
         """测试文件不存在"""
         with pytest.raises(ValidationError):
             validate_fasta_file("/nonexistent/path/file.fasta")
+    
+    def test_fasta_bytes(self):
+        """测试内存中的 FASTA 内容验证"""
+        content = b"\n>test\nACDEF\n"
+        assert validate_fasta_bytes(content) is content
+        
+        with pytest.raises(ValidationError):
+            validate_fasta_bytes(b"ACDEF\n")
 
 
 class TestValidatePdbFile:
@@ -83,3 +92,4 @@ class TestValidatePdbFile:
         
         with pytest.raises(ValidationError):
             validate_pdb_file(str(pdb_file))
+